@@ -0,0 +1,84 @@
+"""
+Per-call latency of ``detect_anomalies`` on the bundled sample data.
+
+Compares the current pipeline, which scores the payload handed to it, with the
+previous behaviour of re-parsing an embedded copy of the sample JSON on every
+call. Run from the ``backend`` directory:
+
+    python -m benchmarks.bench_anomaly_detection --runs 50
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from scipy.stats import zscore
+
+from utils.anomaly_detection import detect_anomalies
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "realistic_financial_data.json")
+
+
+def legacy_detect_anomalies(raw_json: str):
+    """Replica of the old code path: parse the embedded literal, then score it."""
+    data = json.loads(raw_json)
+    transactions = []
+    for bank in data['banks']:
+        if not isinstance(bank, dict) or 'transactions' not in bank:
+            continue
+        for txn in bank['transactions']:
+            try:
+                txn['amount'] = float(txn['amount'])
+                txn['date'] = pd.to_datetime(txn['date'])
+                txn['type'] = txn['type'].lower()
+                txn['bank'] = bank['bankName']
+                transactions.append(txn)
+            except Exception:
+                continue
+
+    df = pd.DataFrame(transactions)
+    debits = df[df['type'] == 'debit'].copy()
+    debits['zscore'] = zscore(debits['amount'])
+    debits['zscore_anomaly'] = debits['zscore'].abs() > 1.5
+    iso_forest = IsolationForest(contamination=0.1, random_state=42)
+    debits['iso_anomaly'] = iso_forest.fit_predict(debits[['amount']]) == -1
+    return debits[debits['zscore_anomaly'] & debits['iso_anomaly']]
+
+
+def time_calls(fn, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples):
+    print(f"{label:<10} median {statistics.median(samples):8.2f} ms   "
+          f"min {min(samples):8.2f} ms   max {max(samples):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(DATA_PATH, "r") as file:
+        raw_json = file.read()
+    data = json.loads(raw_json)
+
+    # Warm up imports and sklearn internals before timing
+    detect_anomalies(data)
+    legacy_detect_anomalies(raw_json)
+
+    print(f"{args.runs} calls on {os.path.basename(DATA_PATH)} ({len(raw_json) / 1024:.1f} KB)")
+    report("before", time_calls(lambda: legacy_detect_anomalies(raw_json), args.runs))
+    report("after", time_calls(lambda: detect_anomalies(data), args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Scaling benchmark for the anomaly pipeline, stage by stage.
+
+Generates synthetic users with the same schema as realistic_financial_data.json
+and times each stage of the pipeline at increasing transaction counts. Every
+size runs in its own interpreter so peak RSS is attributable to that size.
+Results are written as JSON so two runs can be diffed or compared:
+
+    python -m benchmarks.bench_anomaly_scaling --output scaling.json
+    python -m benchmarks.bench_anomaly_scaling --sizes 1000 10000 --compare scaling.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+BANKS = ["HDFC", "ICICI", "SBI", "Axis"]
+DEBIT_DESCRIPTIONS = ["Online Shopping", "Rent", "Electricity Bill", "Dining", "Grocery", "Travel"]
+CREDIT_DESCRIPTIONS = ["Salary Credit", "Bonus", "Refund", "Transfer from Wallet"]
+
+
+def generate_financial_data(n_transactions: int, seed: int = 42) -> Dict[str, Any]:
+    """
+    Synthetic financial data with ``n_transactions`` spread across four banks.
+
+    Amounts are log-normal with roughly 0.5% injected high-value outliers,
+    so every stage has real anomalies to score and format.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2023-10-01T00:00:00.000")
+    offsets_ms = np.sort(rng.integers(0, 2 * 365 * 24 * 3600 * 1000, n_transactions))
+    dates = np.datetime_as_string(start + offsets_ms.astype("timedelta64[ms]"), unit="ms")
+
+    is_debit = rng.random(n_transactions) < 0.7
+    amounts = np.where(is_debit, rng.lognormal(8.3, 0.6, n_transactions), rng.lognormal(10, 0.5, n_transactions))
+    outliers = is_debit & (rng.random(n_transactions) < 0.005)
+    amounts[outliers] *= rng.uniform(5, 15, outliers.sum())
+
+    debit_desc = rng.integers(0, len(DEBIT_DESCRIPTIONS), n_transactions)
+    credit_desc = rng.integers(0, len(CREDIT_DESCRIPTIONS), n_transactions)
+    bank_index = rng.integers(0, len(BANKS), n_transactions)
+
+    banks = [{"bankName": name, "accountNumber": f"{1000000000 + i}", "balance": "100000.00", "transactions": []}
+             for i, name in enumerate(BANKS)]
+    for date, debit, amount, d_desc, c_desc, bank in zip(
+            dates.tolist(), is_debit.tolist(), amounts.tolist(),
+            debit_desc.tolist(), credit_desc.tolist(), bank_index.tolist()):
+        banks[bank]["transactions"].append({
+            "date": date + "Z",
+            "type": "debit" if debit else "credit",
+            "amount": f"{amount:.2f}",
+            "description": DEBIT_DESCRIPTIONS[d_desc] if debit else CREDIT_DESCRIPTIONS[c_desc],
+        })
+    return {"banks": banks, "creditScore": [], "loans": [], "mutualFunds": [], "stocks": [], "insurance": []}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_size(n_transactions: int) -> Dict[str, Any]:
+    """Time every pipeline stage for one synthetic user; runs in a child process."""
+    from scipy.stats import zscore
+    from utils.anomaly_detection import (
+        ISOLATION_FOREST_REASONS, _fit_isolation_forest, _robust_scores, build_feature_matrix,
+        find_duplicate_charges, find_velocity_bursts, format_anomalies, ingest_transactions,
+        normalize_transactions
+    )
+
+    stages: Dict[str, float] = {}
+
+    def timed(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        stages[name] = time.perf_counter() - start
+        return result
+
+    data = timed("generate", generate_financial_data, n_transactions)
+    rss_after_generate = peak_rss_mb()
+
+    columns = timed("ingest", ingest_transactions, data)
+    df, rejected = timed("normalize", normalize_transactions, columns)
+    debits = df[df['type'] == 'debit'].copy()
+
+    debits['zscore'] = timed("zscore", zscore, debits['amount'])
+    debits['zscore_anomaly'] = debits['zscore'].abs() > 1.5
+    timed("robust_zscore", _robust_scores, debits['amount'].to_numpy())
+
+    features = timed("features", build_feature_matrix, debits)
+    model = timed("iforest_fit", _fit_isolation_forest, features)
+    debits['iso_anomaly'] = timed("iforest_predict", model.predict, features) == -1
+
+    timed("duplicates", find_duplicate_charges, debits)
+    timed("velocity", find_velocity_bursts, debits)
+
+    anomalies = debits[debits['zscore_anomaly'] & debits['iso_anomaly']]
+    formatted = timed("format", format_anomalies, anomalies, ISOLATION_FOREST_REASONS)
+
+    return {
+        "transactions": n_transactions,
+        "debits": int(len(debits)),
+        "rejected": rejected,
+        "anomalies": formatted["count"],
+        "stages_seconds": stages,
+        "pipeline_seconds": sum(v for k, v in stages.items() if k != "generate"),
+        "rss_after_generate_mb": rss_after_generate,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure(n_transactions: int, timeout: float) -> Dict[str, Any]:
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_anomaly_scaling", "--child", str(n_transactions)],
+            cwd=BACKEND_DIR, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return {"transactions": n_transactions, "error": f"timed out after {timeout:.0f}s"}
+    if result.returncode != 0:
+        # A negative return code usually means the OOM killer stepped in
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}"
+        return {"transactions": n_transactions, "error": error}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_table(results: List[Dict[str, Any]], baseline: Dict[int, Dict[str, Any]]):
+    stage_names = ["ingest", "normalize", "zscore", "robust_zscore", "features", "iforest_fit", "iforest_predict",
+                   "duplicates", "velocity", "format"]
+    header = f"{'transactions':>12} " + " ".join(f"{name:>15}" for name in stage_names) + f" {'total s':>9} {'peak MB':>9}"
+    print(header)
+    for result in results:
+        if "error" in result:
+            print(f"{result['transactions']:>12} {result['error']}")
+            continue
+        stages = result["stages_seconds"]
+        line = f"{result['transactions']:>12} " + " ".join(f"{stages[name]:>15.4f}" for name in stage_names)
+        line += f" {result['pipeline_seconds']:>9.3f} {result['peak_rss_mb']:>9.1f}"
+        previous = baseline.get(result["transactions"])
+        if previous and "error" not in previous:
+            line += f"  ({result['pipeline_seconds'] / previous['pipeline_seconds']:.2f}x time, " \
+                    f"{result['peak_rss_mb'] / previous['peak_rss_mb']:.2f}x RSS vs baseline)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--output", default="anomaly_scaling_report.json", help="Where to write the JSON report")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    parser.add_argument("--timeout", type=float, default=3600, help="Seconds allowed per size")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(run_size(args.child)))
+        return
+
+    import pandas
+    import sklearn
+
+    results = []
+    for size in args.sizes:
+        results.append(measure(size, args.timeout))
+        print(f"finished {size} transactions", file=sys.stderr)
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": {"numpy": np.__version__, "pandas": pandas.__version__, "scikit-learn": sklearn.__version__},
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = {r["transactions"]: r for r in json.load(file)["results"]}
+    print_table(results, baseline)
+    print(f"report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
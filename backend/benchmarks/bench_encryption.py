@@ -0,0 +1,87 @@
+"""
+Stored size and encrypt/decrypt throughput of financial record formats.
+
+Builds one record per format and compression codec for synthetic users of
+increasing size and reports the BSON size Mongo would store, plus the time to
+encrypt and to decrypt back to a dict (JSON included, as the routes do it).
+Throughput is measured against the size of the JSON payload; "loans ms" is
+the time to read back only the loans section.
+Run from the ``backend`` directory:
+
+    python -m benchmarks.bench_encryption --sizes 1000 10000 100000 --runs 5
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+import bson
+from bson import ObjectId
+
+from benchmarks.bench_anomaly_scaling import generate_financial_data
+from utils.encryptions import (
+    SECTIONED_RECORD_VERSION, WHOLE_RECORD_VERSION, encrypt_data, encrypt_record, zstandard
+)
+from utils.financial_records import decrypt_record, record_associated_data
+
+
+def legacy_record(user_id: ObjectId, data: Dict[str, Any]) -> Dict[str, Any]:
+    encrypted = encrypt_data(data)
+    return {"user_id": user_id, "iv": encrypted["iv"], "encrypted_data": encrypted["encrypted_data"]}
+
+
+def current_record(compression: str, version: int) -> Callable[[ObjectId, Dict[str, Any]], Dict[str, Any]]:
+    def build(user_id: ObjectId, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"user_id": user_id, **encrypt_record(data, record_associated_data(user_id), compression,
+                                                     version=version)}
+    return build
+
+
+FORMATS: Dict[str, Callable[[ObjectId, Dict[str, Any]], Dict[str, Any]]] = {
+    "v1 cbc/base64": legacy_record,
+    "v2 gcm/binary": current_record("none", WHOLE_RECORD_VERSION),
+    "v2 gcm+zlib": current_record("zlib", WHOLE_RECORD_VERSION),
+    "v3 sections+zlib": current_record("zlib", SECTIONED_RECORD_VERSION),
+}
+if zstandard is not None:
+    FORMATS["v2 gcm+zstd"] = current_record("zstd", WHOLE_RECORD_VERSION)
+    FORMATS["v3 sections+zstd"] = current_record("zstd", SECTIONED_RECORD_VERSION)
+
+# Small section read on its own, as /financial-data?sections=loans does
+PARTIAL_SECTIONS = ("loans",)
+
+
+def median_seconds(fn: Callable[[], Any], runs: int) -> float:
+    samples: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    user_id = ObjectId()
+    print(f"{'transactions':>12} {'format':<18} {'record KB':>10} {'encrypt ms':>11} {'decrypt ms':>11} "
+          f"{'decrypt MB/s':>13} {'loans ms':>9}")
+    for size in args.sizes:
+        data = generate_financial_data(size)
+        payload_bytes = len(json.dumps(data, separators=(",", ":")))
+        for name, build in FORMATS.items():
+            record = build(user_id, data)
+            stored = len(bson.encode(record))
+            encrypt_s = median_seconds(lambda: build(user_id, data), args.runs)
+            decrypt_s = median_seconds(lambda: decrypt_record(record), args.runs)
+            partial_s = median_seconds(lambda: decrypt_record(record, PARTIAL_SECTIONS), args.runs)
+            print(f"{size:>12} {name:<18} {stored / 1024:>10.1f} {encrypt_s * 1000:>11.2f} "
+                  f"{decrypt_s * 1000:>11.2f} {payload_bytes / decrypt_s / 1e6:>13.1f} {partial_s * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Cold-start cost of the API: import time and resident memory per router.
+
+Each target is imported in a fresh interpreter so results are not skewed by
+modules an earlier import already loaded. Run from the ``backend`` directory:
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+TARGETS = [
+    "routes.auth",
+    "routes.user",
+    "routes.consent",
+    "routes.financials",
+    "routes.anomaly",
+    "main",
+    # What a worker pays once the lazily loaded analytics stack is warmed up
+    "utils.analytics_loader:warm_up",
+]
+
+PROBE = r"""
+import importlib, json, resource, sys, time
+
+def rss_mb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+target = sys.argv[1]
+module_name, _, func = target.partition(":")
+before = rss_mb()
+start = time.perf_counter()
+module = importlib.import_module(module_name)
+if func:
+    getattr(module, func)()
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "rss_mb": rss_mb(),
+    "rss_delta_mb": rss_mb() - before,
+    "analytics_loaded": "pandas" in sys.modules,
+}))
+"""
+
+
+def measure(target: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, target],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'target':<34} {'import ms':>10} {'RSS MB':>8} {'+RSS MB':>8}  pandas loaded")
+    for target in TARGETS:
+        samples = [measure(target) for _ in range(args.runs)]
+        print(f"{target:<34} "
+              f"{statistics.median(s['seconds'] for s in samples) * 1000:>10.1f} "
+              f"{statistics.median(s['rss_mb'] for s in samples):>8.1f} "
+              f"{statistics.median(s['rss_delta_mb'] for s in samples):>8.1f}  "
+              f"{samples[-1]['analytics_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,3 +25,66 @@ setup_logging()
 JWT_SECRET = os.getenv("JWT_SECRET_KEY", "default_secret_key")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+
+# Anomaly detection model registry
+ANOMALY_MODEL_DIR = os.getenv("ANOMALY_MODEL_DIR", "model_cache")
+ANOMALY_MODEL_CACHE_SIZE = int(os.getenv("ANOMALY_MODEL_CACHE_SIZE", "128"))
+ANOMALY_REFIT_THRESHOLD = float(os.getenv("ANOMALY_REFIT_THRESHOLD", "0.05"))
+
+# Executor for CPU-bound anomaly jobs ("process" or "thread")
+ANOMALY_EXECUTOR = os.getenv("ANOMALY_EXECUTOR", "process")
+ANOMALY_WORKERS = int(os.getenv("ANOMALY_WORKERS", str(min(4, os.cpu_count() or 1))))
+ANOMALY_QUEUE_SIZE = int(os.getenv("ANOMALY_QUEUE_SIZE", "16"))
+ANOMALY_JOB_TIMEOUT = float(os.getenv("ANOMALY_JOB_TIMEOUT", "30"))
+ANOMALY_RETRY_AFTER = int(os.getenv("ANOMALY_RETRY_AFTER", "5"))
+
+# Users fetched, decrypted and scored together by a batch sweep
+ANOMALY_SWEEP_BATCH_SIZE = int(os.getenv("ANOMALY_SWEEP_BATCH_SIZE", "100"))
+
+# Cache of /anomalies results keyed by a hash of the input
+ANOMALY_RESULT_CACHE_TTL = float(os.getenv("ANOMALY_RESULT_CACHE_TTL", "300"))
+ANOMALY_RESULT_CACHE_SIZE = int(os.getenv("ANOMALY_RESULT_CACHE_SIZE", "256"))
+
+# Import the analytics stack in the background right after startup
+ANOMALY_WARMUP = os.getenv("ANOMALY_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Debit count up to which the NumPy-only robust detector is used
+ANOMALY_FAST_PATH_MAX_ROWS = int(os.getenv("ANOMALY_FAST_PATH_MAX_ROWS", "1000"))
+
+# Transaction count above which detection streams over chunks in bounded memory
+ANOMALY_STREAMING_MIN_ROWS = int(os.getenv("ANOMALY_STREAMING_MIN_ROWS", "500000"))
+
+# Repeat debits (same bank, description, amount) this close together are flagged
+ANOMALY_DUPLICATE_WINDOW_MINUTES = float(os.getenv("ANOMALY_DUPLICATE_WINDOW_MINUTES", "10"))
+
+# Velocity bursts: more than MAX_COUNT debits, or over MAX_AMOUNT rupees, within the window
+ANOMALY_VELOCITY_WINDOW_MINUTES = float(os.getenv("ANOMALY_VELOCITY_WINDOW_MINUTES", "10"))
+ANOMALY_VELOCITY_MAX_COUNT = int(os.getenv("ANOMALY_VELOCITY_MAX_COUNT", "5"))
+ANOMALY_VELOCITY_MAX_AMOUNT = float(os.getenv("ANOMALY_VELOCITY_MAX_AMOUNT", "50000"))
+
+# Recurring payments: debits with the same description within this relative amount spread
+ANOMALY_RECURRING_MIN_OCCURRENCES = int(os.getenv("ANOMALY_RECURRING_MIN_OCCURRENCES", "3"))
+ANOMALY_RECURRING_AMOUNT_TOLERANCE = float(os.getenv("ANOMALY_RECURRING_AMOUNT_TOLERANCE", "0.05"))
+
+# Timezone used for the hour and weekday features of contextual scoring
+ANOMALY_TIMEZONE = os.getenv("ANOMALY_TIMEZONE", "Asia/Kolkata")
+
+# Anomaly events buffered per push connection; the oldest are dropped beyond this
+ANOMALY_EVENT_BUFFER_SIZE = int(os.getenv("ANOMALY_EVENT_BUFFER_SIZE", "100"))
+ANOMALY_EVENT_KEEPALIVE = float(os.getenv("ANOMALY_EVENT_KEEPALIVE", "15"))
+
+# Compression applied to financial payloads before encryption: "zlib", "zstd" (needs
+# the zstandard package) or "none"; the level defaults to each codec's own default
+FINANCIAL_COMPRESSION = os.getenv("FINANCIAL_COMPRESSION", "zlib").lower()
+FINANCIAL_COMPRESSION_LEVEL = int(os.getenv("FINANCIAL_COMPRESSION_LEVEL")) if os.getenv("FINANCIAL_COMPRESSION_LEVEL") else None
+
+# Per-worker cache of decrypted financial records
+FINANCIAL_CACHE_TTL = float(os.getenv("FINANCIAL_CACHE_TTL", "300"))
+FINANCIAL_CACHE_SIZE = int(os.getenv("FINANCIAL_CACHE_SIZE", "1024"))
+FINANCIAL_CACHE_MAX_BYTES = int(os.getenv("FINANCIAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Financial snapshots kept per user by the retention job (python -m utils.snapshot_retention)
+FINANCIAL_SNAPSHOT_RETENTION = int(os.getenv("FINANCIAL_SNAPSHOT_RETENTION", "5"))
+
+# Also store each transaction as its own encrypted, indexed document on consent
+FINANCIAL_TRANSACTION_STORE = os.getenv("FINANCIAL_TRANSACTION_STORE", "false").lower() in ("1", "true", "yes")
@@ -6,3 +6,6 @@ client = AsyncIOMotorClient(MONGO_URL)
 db = client.vnr_hack
 users_collection = db.users
 financial_collection = db.financial_data
+anomalies_collection = db.anomalies
+anomaly_watermarks_collection = db.anomaly_watermarks
+transactions_collection = db.transactions
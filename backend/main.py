@@ -1,8 +1,45 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from config import (
+    ANOMALY_EXECUTOR, ANOMALY_WORKERS, ANOMALY_QUEUE_SIZE, ANOMALY_JOB_TIMEOUT, ANOMALY_WARMUP
+)
 from routes import auth, user, consent, financials, anomaly
+from utils import anomaly_store, financial_records, transaction_store
+from utils.job_pool import JobPool
+from utils.analytics_loader import warm_up_in_background
+
+logger = logging.getLogger(__name__)
+
+
+async def ensure_indexes():
+    """Create Mongo indexes, logging instead of raising so startup never fails on it."""
+    for create in (financial_records.ensure_indexes, anomaly_store.ensure_indexes,
+                   transaction_store.ensure_indexes):
+        try:
+            await create()
+        except Exception:
+            logger.exception("Could not create indexes with %s.%s", create.__module__, create.__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # CPU-bound anomaly jobs run here so they never block the event loop
+    app.state.anomaly_pool = JobPool(
+        ANOMALY_EXECUTOR, ANOMALY_WORKERS, ANOMALY_QUEUE_SIZE, ANOMALY_JOB_TIMEOUT
+    )
+    app.state.anomaly_pool.start()
+    app.state.index_task = asyncio.create_task(ensure_indexes())
+    if ANOMALY_WARMUP:
+        # Keep a reference so the task is not garbage collected mid-flight
+        app.state.warmup_task = asyncio.create_task(warm_up_in_background(app.state.anomaly_pool))
+    yield
+    app.state.anomaly_pool.shutdown()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # For Next.js frontend
 origins = ["*"]
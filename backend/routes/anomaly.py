@@ -1,15 +1,112 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime
+import asyncio
+import functools
+import hashlib
 import json
 import os
-from utils.anomaly_detection import detect_anomalies
-from typing import List, Dict, Any
+from config import (
+    ANOMALY_RETRY_AFTER, ANOMALY_RESULT_CACHE_TTL, ANOMALY_RESULT_CACHE_SIZE, ANOMALY_EVENT_KEEPALIVE,
+    ANOMALY_STREAMING_MIN_ROWS
+)
+from utils import anomaly_store, transaction_store
+from utils.analytics_loader import LazyModule
+from utils.anomaly_events import anomaly_broker
+from utils.financial_records import (
+    ANOMALY_SECTIONS, fetch_latest_fields, fetch_record, decrypt_record
+)
+from utils.job_pool import PoolSaturated, JobTimeout
+from utils.result_cache import TTLCache
+from db.db import financial_collection
+from schema.anomaly import ScoreRequest, BatchRequest
+from typing import List, Dict, Any, Literal, Optional
 
 router = APIRouter()
 
+# Detector tiers, see utils.anomaly_detection.select_tier
+Tier = Literal["robust", "isolation_forest", "streaming"]
+
+# pandas/sklearn/scipy are only imported when an anomaly endpoint first needs them
+anomaly_detection = LazyModule("utils.anomaly_detection")
+incremental_scoring = LazyModule("utils.incremental_scoring")
+streaming_detection = LazyModule("utils.streaming_detection")
+anomaly_batch = LazyModule("utils.anomaly_batch")
+
+# Times /anomalies/score rescores when another call updated the statistics first
+SCORE_ATTEMPTS = 3
+
+# Detection results keyed by a content hash of their input
+result_cache = TTLCache(ANOMALY_RESULT_CACHE_SIZE, ANOMALY_RESULT_CACHE_TTL)
+
+
+def _etag_for(key: str) -> str:
+    return '"' + hashlib.sha256(key.encode()).hexdigest() + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _page(result: Dict[str, Any], offset: int, limit: Optional[int]) -> Dict[str, Any]:
+    end = None if limit is None else offset + limit
+    return {**result, "anomalies": result["anomalies"][offset:end]}
+
+
+async def _cached_detection(request: Request, response: Response, key: str, fn, load_args,
+                            offset: int = 0, limit: Optional[int] = None):
+    """
+    Serve a page of a detection result from the cache, or compute and cache it.
+
+    ``load_args`` is only called on a cache miss and returns the arguments
+    for ``fn``, so cached hits skip loading the input entirely. The whole
+    result is cached under ``key`` and each request slices its own
+    ``offset``/``limit`` page from it, so paging never reruns detection.
+
+    Responses carry a strong ETag derived from ``key`` and the page. A
+    matching ``If-None-Match`` on a cached result is answered with 304.
+    """
+    etag = _etag_for(f"{key}:{offset}:{limit}")
+    cached = result_cache.get(key)
+    if cached is not None:
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+    else:
+        cached = await _run_job(request, fn, *load_args())
+        result_cache.set(key, cached)
+
+    response.headers["ETag"] = etag
+    return _page(cached, offset, limit)
+
+
+async def _run_job(request: Request, fn, *args):
+    """Run a CPU-bound job on the app's anomaly pool, mapping pool errors to HTTP."""
+    try:
+        return await request.app.state.anomaly_pool.run(fn, *args)
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=503,
+            detail="Anomaly detection is busy, please retry shortly.",
+            headers={"Retry-After": str(ANOMALY_RETRY_AFTER)}
+        )
+    except JobTimeout:
+        raise HTTPException(status_code=504, detail="Anomaly detection timed out.")
+
+
 @router.get("/anomalies")
-async def get_anomalies():
+async def get_anomalies(request: Request, response: Response, tier: Optional[Tier] = None,
+                        offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1)):
     """
     Detect and return anomalies in the realistic financial data.
+
+    ``offset``/``limit`` page through anomalies ordered by amount, largest
+    first. Results are cached until the file's mtime or size changes.
     """
     try:
         # Load the realistic financial data from the backend directory
@@ -18,37 +115,239 @@ async def get_anomalies():
         
         if not os.path.exists(data_path):
             raise HTTPException(status_code=404, detail="Realistic financial data file not found")
-        
-        with open(data_path, 'r') as file:
-            financial_data = json.load(file)
 
-        print(financial_data)
+        stat = os.stat(data_path)
+        key = f"file:{os.path.realpath(data_path)}:{stat.st_mtime_ns}:{stat.st_size}:{tier or ''}"
+
+        def load_args():
+            with open(data_path, 'r') as file:
+                return json.load(file), None, tier
         
         # Apply anomaly detection
-        anomalies = detect_anomalies(financial_data)
-        
-        return {
-            "anomalies": anomalies,
-            "count": len(anomalies)
-        }
+        return await _cached_detection(
+            request, response, key, anomaly_detection.run_anomaly_detection, load_args, offset, limit
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error detecting anomalies: {str(e)}")
 
 
 @router.post("/anomalies")
-async def detect_anomalies_from_data(financial_data: Dict[str, Any]):
+async def detect_anomalies_from_data(request: Request, response: Response,
+                                     financial_data: Dict[str, Any], user_id: Optional[str] = None,
+                                     tier: Optional[Tier] = None, offset: int = Query(0, ge=0),
+                                     limit: Optional[int] = Query(None, ge=1)):
     """
     Detect anomalies in provided financial data.
+
+    Pass ``user_id`` to reuse that user's cached model between calls, and
+    ``tier`` to force a detector instead of choosing one by data size.
+    ``offset``/``limit`` page through anomalies ordered by amount, largest
+    first. Results are cached by a hash of the raw request body.
     """
     try:
+        # Hash the raw body, already read to parse financial_data, off the event loop
+        body = await request.body()
+        payload_hash = (await asyncio.to_thread(hashlib.sha256, body)).hexdigest()
+        key = f"payload:{user_id or ''}:{tier or ''}:{payload_hash}"
+
         # Apply anomaly detection to the provided data
-        anomalies = detect_anomalies(financial_data)
-        
-        return {
-            "anomalies": anomalies,
-            "count": len(anomalies)
-        }
+        return await _cached_detection(
+            request, response, key, anomaly_detection.run_anomaly_detection, lambda: (financial_data, user_id, tier),
+            offset, limit
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error detecting anomalies: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error detecting anomalies: {str(e)}")
+
+
+@router.post("/anomalies/score")
+async def score_incoming_transactions(request: Request, payload: ScoreRequest):
+    """
+    Score newly arrived transactions against the user's running statistics.
+
+    Statistics are bootstrapped from the stored financial record on first use
+    (or when the stored ones are unusable) and then updated in place, so each
+    new transaction costs O(1); the encrypted history is only read to
+    bootstrap. The update only applies if no other call changed the
+    statistics in the meantime; otherwise scoring is retried against the
+    fresh statistics.
+    """
+    try:
+        for _ in range(SCORE_ATTEMPTS):
+            record = await fetch_latest_fields(payload.user_id, ["anomaly_stats"])
+            if not record:
+                raise HTTPException(status_code=404, detail="No financial data found for user.")
+
+            stats = record.get("anomaly_stats")
+            history = None
+            if not incremental_scoring.stats_usable(stats):
+                stats = None
+                full_record = await fetch_record(record["_id"], ANOMALY_SECTIONS)
+                if full_record is None:
+                    # Replaced by a newer snapshot meanwhile; start over from that one
+                    continue
+                history = await asyncio.to_thread(decrypt_record, full_record, ANOMALY_SECTIONS)
+
+            result, updated = await _run_job(
+                request, incremental_scoring.score_new_transactions, payload.transactions, stats, history
+            )
+            if updated is None:
+                # Non-finite statistics are never saved, so later calls bootstrap again
+                break
+
+            stored_count = ((record.get("anomaly_stats") or {}).get("overall") or {}).get("count")
+            saved = await financial_collection.update_one(
+                {
+                    "_id": record["_id"],
+                    "anomaly_stats.overall.count": stored_count if stored_count is not None else {"$exists": False}
+                },
+                {"$set": {"anomaly_stats": updated}}
+            )
+            if saved.matched_count:
+                break
+        else:
+            raise HTTPException(
+                status_code=409,
+                detail="Statistics changed concurrently, please retry.",
+                headers={"Retry-After": str(ANOMALY_RETRY_AFTER)}
+            )
+
+        anomaly_broker.publish(payload.user_id, result["anomalies"], "score")
+
+        return result
+
+    except HTTPException:
+        raise
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error scoring transactions: {str(e)}")
+
+
+@router.post("/anomalies/batch")
+async def detect_anomalies_batch(request: Request, payload: BatchRequest):
+    """
+    Detect anomalies for many users, streamed back as NDJSON.
+
+    Each line is one user's result (or error) and is sent as soon as that
+    user's detection finishes. ``limit`` caps the anomalies listed per user.
+    """
+    try:
+        results = anomaly_batch.sweep(payload.user_ids, request.app.state.anomaly_pool, payload.limit)
+        # Start the sweep here so invalid ids fail before the stream opens
+        first = await results.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error detecting anomalies: {str(e)}")
+
+    async def lines():
+        if first is None:
+            return
+        yield json.dumps(first) + "\n"
+        async for result in results:
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/anomalies/{user_id}")
+async def refresh_user_anomalies(request: Request, user_id: str):
+    """
+    Score a user's transactions since their watermark and store the anomalies.
+
+    Earlier transactions still shape the statistics new ones are scored
+    against, but only transactions after the watermark can be flagged, so
+    each anomaly is stored once. Returns the newly found anomalies.
+
+    Histories past ``ANOMALY_STREAMING_MIN_ROWS`` that are also stored per
+    transaction are streamed from those documents into the detector, so the
+    snapshot is never decrypted whole.
+    """
+    try:
+        # No ciphertext yet: the streaming path never needs the snapshot's sections
+        record = await fetch_latest_fields(user_id, ["transactions_indexed"])
+        if not record:
+            raise HTTPException(status_code=404, detail="No financial data found for user.")
+
+        since = await anomaly_store.get_watermark(user_id)
+        if (record.get("transactions_indexed") and
+                await transaction_store.count_stored_transactions(user_id, record["_id"]) > ANOMALY_STREAMING_MIN_ROWS):
+            source = functools.partial(transaction_store.iter_stored_transactions, user_id, record["_id"])
+            result = await _run_job(
+                request, functools.partial(streaming_detection.detect_anomalies_streaming, source, since=since)
+            )
+        else:
+            full_record = await fetch_record(record["_id"], ANOMALY_SECTIONS)
+            if full_record is None:
+                raise HTTPException(status_code=409, detail="Financial data changed meanwhile, please retry.")
+            financial_data = await asyncio.to_thread(decrypt_record, full_record, ANOMALY_SECTIONS)
+            result = await _run_job(
+                request, anomaly_detection.run_anomaly_detection, financial_data, user_id, None, 0, None, since
+            )
+        result["stored"] = await anomaly_store.save_anomalies(user_id, result["anomalies"], result["watermark"])
+        anomaly_broker.publish(user_id, result["anomalies"], "refresh")
+        return result
+
+    except HTTPException:
+        raise
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error detecting anomalies: {str(e)}")
+
+
+@router.get("/anomalies/{user_id}")
+async def get_user_anomalies(user_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """
+    Stored anomalies for a user, newest first.
+
+    Served straight from the anomalies collection; ``start``/``end`` bound
+    the transaction date (inclusive/exclusive) and ``offset``/``limit`` page
+    through the matches.
+    """
+    try:
+        return await anomaly_store.find_anomalies(user_id, start, end, offset, limit)
+
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching anomalies: {str(e)}")
+
+
+@router.get("/anomalies/{user_id}/events")
+async def stream_user_anomalies(request: Request, user_id: str):
+    """
+    Push a user's newly detected anomalies as Server-Sent Events.
+
+    Subscribe once; every anomaly found afterwards by ``/anomalies/score`` or
+    ``POST /anomalies/{user_id}`` arrives as an ``anomaly`` event. Nothing is
+    recomputed for a subscriber, and a comment is sent every
+    ``ANOMALY_EVENT_KEEPALIVE`` seconds to keep idle connections open.
+    """
+    try:
+        ObjectId(user_id)
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        with anomaly_broker.subscribe(user_id) as subscription:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.next(), ANOMALY_EVENT_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: anomaly\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
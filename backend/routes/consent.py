@@ -1,10 +1,9 @@
 from fastapi import APIRouter, HTTPException
-from utils.encryptions import encrypt_data
-from db.db import financial_collection
+from config import FINANCIAL_TRANSACTION_STORE
+from utils.financial_records import save_snapshot, invalidate_cached_records
+from utils.transaction_store import index_transactions
 import json
 import os
-from bson import ObjectId
-from datetime import datetime
 
 
 router = APIRouter()
@@ -17,23 +16,21 @@ async def user_consent(user_id: str):
         with open('realistic_financial_data.json', "r") as file:
             data = json.load(file)
 
-        # Encrypt data
-        encrypted = encrypt_data(data)
-
-        # Store in separate financial_data collection
-        await financial_collection.insert_one({
-            "user_id": ObjectId(user_id),
-            "iv": encrypted["iv"],
-            "encrypted_data": encrypted["encrypted_data"],
-            "consent_given": True,
-            "created_at": datetime.utcnow()
-        })
+        # Store an encrypted snapshot in the financial_data collection, unless nothing changed
+        snapshot = await save_snapshot(user_id, data)
+        if snapshot["created"]:
+            invalidate_cached_records(user_id)
+        if FINANCIAL_TRANSACTION_STORE and not snapshot["transactions_indexed"]:
+            # One queryable document per transaction, kept in step with the latest snapshot
+            await index_transactions(user_id, snapshot["record_id"], data)
 
 
 
         return {
              "message": "Financial data encrypted and stored securely.",
-            "user_id": user_id
+            "user_id": user_id,
+            "snapshot": snapshot["snapshot"],
+            "changed": snapshot["created"]
         }
 
     except Exception as e:
@@ -1,32 +1,124 @@
-from fastapi import APIRouter, HTTPException
-from db.db import financial_collection
-from utils.encryptions import decrypt_data
-from bson import ObjectId
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from bson.errors import InvalidId
+import asyncio
+import json
+from datetime import datetime
+from typing import List, Literal, Optional
+from utils.encryptions import FINANCIAL_SECTIONS
+from utils.financial_records import iter_financial_data, load_financial_data, record_cache
+from utils.transaction_store import filter_transactions, find_transactions
+from schema.financials import FinancialBatchRequest
 
 router = APIRouter()
 
+TransactionType = Literal["debit", "credit"]
+
+
+def _check_sections(sections: List[str]):
+    unknown = sorted(set(sections) - set(FINANCIAL_SECTIONS))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sections: {', '.join(unknown)}. Valid sections: {', '.join(FINANCIAL_SECTIONS)}"
+        )
+
+
+@router.get("/financial-data/cache/stats")
+async def get_financial_cache_stats():
+    """Hit/miss counters and size of this worker's decrypted-record cache."""
+    return record_cache.stats()
+
+@router.post("/financial-data/batch")
+async def get_financial_data_batch(payload: FinancialBatchRequest):
+    """
+    Latest financial data for many users, streamed back as NDJSON.
+
+    All records are read in one aggregation and decrypted in parallel
+    threads; each line is one user's data (or error), sent as soon as it is
+    decrypted. ``sections`` limits what is fetched and returned per user.
+    """
+    if payload.sections is not None:
+        _check_sections(payload.sections)
+    try:
+        results = iter_financial_data(payload.user_ids, payload.sections)
+        # Start the fetch here so invalid ids fail before the stream opens
+        first = await results.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def lines():
+        if first is None:
+            return
+        yield json.dumps(first) + "\n"
+        async for result in results:
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.get("/financial-data/{user_id}")
-async def get_financial_data(user_id: str):
+async def get_financial_data(user_id: str, sections: Optional[str] = None):
+    """
+    Latest financial data for a user.
+
+    ``sections`` is a comma-separated list such as ``loans,creditScore``;
+    only those sections are fetched, decrypted and returned. Decrypted
+    sections are cached per record, so repeat loads skip the crypto.
+    """
     try:
-        # Fetch latest encrypted financial data for this user
-        record = await financial_collection.find_one(
-            {"user_id": ObjectId(user_id)},
-            sort=[("created_at", -1)]  # in case you store multiple versions
-        )
+        requested = None
+        if sections:
+            requested = [name.strip() for name in sections.split(",") if name.strip()]
+            _check_sections(requested)
 
-        if not record:
-            raise HTTPException(status_code=404, detail="No financial data found for user.")
+        # Latest financial data for this user, decrypted or from the cache
+        decrypted = await load_financial_data(user_id, requested)
 
-        # Decrypt it
-        decrypted = decrypt_data(
-            encrypted_data_b64=record["encrypted_data"],
-            iv_b64=record["iv"]
-        )
+        if decrypted is None:
+            raise HTTPException(status_code=404, detail="No financial data found for user.")
 
         return {
             "user_id": user_id,
             "financial_data": decrypted
         }
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/financial-data/{user_id}/transactions")
+async def get_transactions(user_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                           bank: Optional[str] = None, txn_type: Optional[TransactionType] = Query(None, alias="type"),
+                           offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """
+    A user's transactions, newest first.
+
+    ``start``/``end`` bound the date (inclusive/exclusive), ``bank`` and
+    ``type`` filter, and ``offset``/``limit`` page through the matches. When
+    the latest snapshot is stored per transaction the filters run in Mongo
+    and only the returned rows are decrypted; otherwise the banks section is
+    loaded and filtered here.
+    """
+    try:
+        result = await find_transactions(user_id, start, end, bank, txn_type, offset, limit)
+        if result is None:
+            decrypted = await load_financial_data(user_id, ["banks"])
+            if decrypted is None:
+                raise HTTPException(status_code=404, detail="No financial data found for user.")
+            result = await asyncio.to_thread(filter_transactions, decrypted, start, end, bank, txn_type, offset, limit)
+
+        return {"user_id": user_id, **result}
+
+    except HTTPException:
+        raise
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
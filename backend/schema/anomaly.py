@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+class ScoreRequest(BaseModel):
+    user_id: str
+    transactions: List[Dict[str, Any]]
+
+class BatchRequest(BaseModel):
+    user_ids: List[str]
+    # Largest anomalies to return per user; all of them when omitted
+    limit: Optional[int] = Field(None, ge=1)
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class FinancialBatchRequest(BaseModel):
+    user_ids: List[str]
+    # Sections to return per user, e.g. ["loans", "creditScore"]; all of them when omitted
+    sections: Optional[List[str]] = None
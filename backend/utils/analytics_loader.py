@@ -0,0 +1,67 @@
+"""
+Deferred loading of the analytics stack (pandas, scikit-learn, scipy)
+
+Importing the anomaly modules pulls in several hundred milliseconds and tens
+of MB of dependencies. Routes reach them through ``LazyModule`` so workers can
+serve auth and financial-data requests before that cost is paid, and the app
+warms them up in the background after startup.
+"""
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from types import ModuleType
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_MODULES = (
+    "utils.anomaly_detection",
+    "utils.streaming_detection",
+    "utils.incremental_scoring",
+    "utils.anomaly_batch",
+)
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def warm_up():
+    """Import every analytics module in the current process."""
+    for name in ANALYTICS_MODULES:
+        importlib.import_module(name)
+
+
+async def warm_up_in_background(pool=None):
+    """
+    Import the analytics modules off the event loop, then in every pool worker.
+
+    One warm-up job is submitted per worker at once; each takes long enough
+    that the executor hands them to separate workers. Meant to be scheduled as a task once the app has started; failures are
+    logged and otherwise ignored since modules still load on first use.
+    """
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(warm_up)
+        if pool is not None and pool.kind == "process":
+            await asyncio.gather(*(pool.run(warm_up) for _ in range(pool.max_workers)))
+    except Exception as e:
+        logger.warning(f"Analytics warm-up failed: {e}")
+        return
+    logger.info(f"Analytics modules warmed up in {time.perf_counter() - start:.2f}s")
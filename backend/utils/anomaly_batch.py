@@ -0,0 +1,152 @@
+"""
+Anomaly sweeps across many users
+
+Can be run as a nightly job from the ``backend`` directory:
+
+    python -m utils.anomaly_batch --all-consented > sweep.ndjson
+    python -m utils.anomaly_batch 64f0c0ffee... 64f0c0ffef...
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config import ANOMALY_EXECUTOR, ANOMALY_WORKERS, ANOMALY_JOB_TIMEOUT, ANOMALY_SWEEP_BATCH_SIZE
+from utils.anomaly_detection import ingest_transactions, loan_emis, normalize_transactions, score_transactions
+from utils.financial_records import (
+    ANOMALY_SECTIONS, decrypt_record, fetch_consented_user_ids, fetch_latest_records
+)
+from utils.job_pool import JobPool, PoolSaturated, JobTimeout
+
+
+def stack_transactions(datasets: Dict[str, Dict[str, Any]]
+                       ) -> Tuple[pd.DataFrame, Dict[str, int], Dict[str, Dict[str, float]]]:
+    """
+    Ingest and normalize every user's transactions into one frame.
+
+    Args:
+        datasets: Mapping of user id to decrypted financial data
+
+    Returns:
+        Tuple of (normalized transactions with a ``user_id`` column, number
+        of rejected rows per user, loan EMIs per user)
+    """
+    columns: Dict[str, List[Any]] = {"user_id": []}
+    for user_id, data in datasets.items():
+        user_columns = ingest_transactions(data)
+        for name, values in user_columns.items():
+            columns.setdefault(name, []).extend(values)
+        columns["user_id"].extend([user_id] * len(user_columns["date"]))
+
+    ingested = pd.Series(columns["user_id"], dtype=object).value_counts()
+    df, _ = normalize_transactions(columns)
+    kept = df['user_id'].value_counts() if not df.empty else pd.Series(dtype=int)
+    rejected = ingested.sub(kept, fill_value=0).astype(int)
+    # Kept out of df.attrs, which pandas deep-copies on every operation and pickles into each job
+    return (
+        df,
+        {user_id: int(rejected.get(user_id, 0)) for user_id in datasets},
+        {user_id: loan_emis(data) for user_id, data in datasets.items()}
+    )
+
+
+def _group_by_user(datasets: Dict[str, Dict[str, Any]]
+                   ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, int], Dict[str, Dict[str, float]]]:
+    df, rejected, emis = stack_transactions(datasets)
+    groups = dict(tuple(df.groupby('user_id', sort=False))) if not df.empty else {}
+    empty = df.iloc[0:0]
+    return {user_id: groups.get(user_id, empty) for user_id in datasets}, rejected, emis
+
+
+def _score_user(user_id: str, frame: pd.DataFrame, rejected: int, emis: Dict[str, float],
+                limit: Optional[int]) -> Dict[str, Any]:
+    result = score_transactions(frame.drop(columns=['user_id']), user_id, limit=limit, emis=emis)
+    return {"user_id": user_id, **result, "rejected": rejected}
+
+
+async def sweep(user_ids: List[str], pool: JobPool, limit: Optional[int] = None,
+                batch_size: int = ANOMALY_SWEEP_BATCH_SIZE) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Detect anomalies for many users, yielding each result as soon as it is ready.
+
+    Users are swept ``batch_size`` at a time, so at most one batch of
+    histories is in memory and results start arriving after the first batch
+    is fetched. Per batch, records are fetched in one aggregation and
+    decrypted in parallel threads; per-user scoring runs on ``pool`` with at
+    most one job per worker. ``limit`` caps the anomalies listed per user,
+    largest amounts first. Duplicate ids are swept once.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    user_ids = list(dict.fromkeys(user_ids))
+    for start in range(0, len(user_ids), batch_size):
+        async for result in _sweep_batch(user_ids[start:start + batch_size], pool, limit):
+            yield result
+
+
+async def _sweep_batch(user_ids: List[str], pool: JobPool, limit: Optional[int]) -> AsyncIterator[Dict[str, Any]]:
+    records = await fetch_latest_records(user_ids, ANOMALY_SECTIONS)
+    for user_id in user_ids:
+        if user_id not in records:
+            yield {"user_id": user_id, "error": "No financial data found for user."}
+
+    found = [user_id for user_id in user_ids if user_id in records]
+    decrypted = await asyncio.gather(*(
+        asyncio.to_thread(decrypt_record, records[user_id], ANOMALY_SECTIONS) for user_id in found
+    ))
+    # Parsing every user's transactions is CPU-bound, so keep it off the event loop
+    groups, rejected, emis = await asyncio.to_thread(_group_by_user, dict(zip(found, decrypted)))
+
+    slots = asyncio.Semaphore(pool.max_workers)
+
+    async def run(user_id: str) -> Dict[str, Any]:
+        async with slots:
+            try:
+                return await pool.run(_score_user, user_id, groups[user_id], rejected[user_id], emis[user_id], limit)
+            except PoolSaturated:
+                return {"user_id": user_id, "error": "Anomaly detection is busy, please retry."}
+            except JobTimeout:
+                return {"user_id": user_id, "error": "Anomaly detection timed out."}
+            except Exception as e:
+                return {"user_id": user_id, "error": f"Error detecting anomalies: {str(e)}"}
+
+    for result in asyncio.as_completed([run(user_id) for user_id in found]):
+        yield await result
+
+
+async def _main(args: argparse.Namespace):
+    user_ids = args.user_ids
+    if args.all_consented:
+        user_ids = await fetch_consented_user_ids()
+
+    pool = JobPool(ANOMALY_EXECUTOR, args.workers or ANOMALY_WORKERS, args.batch_size, ANOMALY_JOB_TIMEOUT)
+    pool.start()
+    try:
+        async for result in sweep(user_ids, pool, args.limit, args.batch_size):
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run anomaly detection for many users and print NDJSON results.")
+    parser.add_argument("user_ids", nargs="*", help="User ids to sweep")
+    parser.add_argument("--all-consented", action="store_true", help="Sweep every user that has given consent")
+    parser.add_argument("--workers", type=int, help="Number of pool workers (defaults to ANOMALY_WORKERS)")
+    parser.add_argument("--limit", type=int, help="Largest anomalies to report per user")
+    parser.add_argument("--batch-size", type=int, default=ANOMALY_SWEEP_BATCH_SIZE,
+                        help="Users held in memory at once (defaults to ANOMALY_SWEEP_BATCH_SIZE)")
+    args = parser.parse_args()
+    if not args.user_ids and not args.all_consented:
+        parser.error("pass user ids or --all-consented")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
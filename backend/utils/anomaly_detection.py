@@ -1,1748 +1,719 @@
+import math
+from datetime import datetime
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
 from scipy.stats import zscore
-import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
-def detect_anomalies(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+from config import (
+    ANOMALY_FAST_PATH_MAX_ROWS, ANOMALY_STREAMING_MIN_ROWS, ANOMALY_DUPLICATE_WINDOW_MINUTES,
+    ANOMALY_VELOCITY_WINDOW_MINUTES, ANOMALY_VELOCITY_MAX_COUNT, ANOMALY_VELOCITY_MAX_AMOUNT,
+    ANOMALY_RECURRING_MIN_OCCURRENCES, ANOMALY_RECURRING_AMOUNT_TOLERANCE, ANOMALY_TIMEZONE
+)
+from utils.model_registry import model_registry
+
+TRANSACTION_COLUMNS = ("date", "amount", "type", "description", "bank")
+
+TIER_ROBUST = "robust"
+TIER_ISOLATION_FOREST = "isolation_forest"
+TIER_STREAMING = "streaming"
+TIERS = (TIER_ROBUST, TIER_ISOLATION_FOREST, TIER_STREAMING)
+
+# Modified z-score cut-off recommended by Iglewicz and Hoaglin
+ROBUST_ZSCORE_THRESHOLD = 3.5
+# Share of amounts in each tail treated as outside the typical range
+QUANTILE_TAIL = 0.05
+
+# Flag column -> reason, per tier; a debit is an anomaly when every flag is set
+ROBUST_REASONS = {
+    'zscore_anomaly': "Unusual transaction amount (robust Z-score)",
+    'range_anomaly': "Outside typical amount range (quantile)",
+}
+# Contextual checks of the robust tier; a debit unusually large for its category is flagged on its own
+ROBUST_CONTEXT_REASONS = {
+    'category_anomaly': "Unusual amount for this category (robust Z-score)",
+    'hour_anomaly': "Unusual time of day for this user",
+}
+# Categories need this many debits before their median/MAD is trusted
+ROBUST_CATEGORY_MIN_COUNT = 5
+# Local hours holding less than this share of a user's debits are rare for them
+RARE_HOUR_SHARE = 0.02
+# At a rare hour, a smaller category z-score is enough
+ROBUST_RARE_HOUR_ZSCORE = 2.0
+# Columns of the contextual feature matrix fed to the Isolation Forest
+FEATURE_COLUMNS = ("amount", "log_amount", "hour", "weekday", "bank_share", "category_share",
+                   "category_zscore", "days_since_category")
+ISOLATION_FOREST_REASONS = {
+    'zscore_anomaly': "Unusual transaction amount (Z-score)",
+    'iso_anomaly': "Unusual pattern detected (Isolation Forest)",
+}
+# Pattern detectors; each one flags a debit on its own
+PATTERN_REASONS = {
+    'duplicate_anomaly': "Possible duplicate charge (same bank, description and amount)",
+    'velocity_anomaly': "Burst of debits in a short window (velocity)",
+}
+
+# Named recurrence periods in days, with the relative slack allowed on the median gap
+RECURRING_PERIODS = {
+    "weekly": 7.0,
+    "fortnightly": 14.0,
+    "monthly": 30.44,
+    "quarterly": 91.31,
+    "yearly": 365.25,
+}
+RECURRING_PERIOD_TOLERANCE = 0.15
+# Share of a series' gaps that must sit within this relative distance of its median gap
+RECURRING_GAP_JITTER = 0.25
+RECURRING_MIN_REGULAR_SHARE = 0.75
+# Loan EMIs are debited at the exact amount, give or take rounding
+EMI_AMOUNT_TOLERANCE = 1.0
+
+
+def ingest_transactions(data: Dict[str, Any]) -> Dict[str, List[Any]]:
     """
-    Detect anomalies in transaction data using Z-score and Isolation Forest methods.
-    
+    Flatten ``banks[].transactions[]`` into columnar lists in a single pass.
+
+    Values are copied as-is; parsing and validation happen column-wise in
+    ``normalize_transactions``. The caller's payload is never mutated.
+
     Args:
         data: Financial data containing banks and their transactions
-        
+
     Returns:
-        List of anomalies with details
+        Mapping of column name to a list of raw values, one entry per transaction
     """
-    imported_data = '''
-{
-  "banks": [
-    {
-      "bankName": "HDFC",
-      "accountNumber": "5058270585",
-      "balance": "383353.02",
-      "transactions": [
-        {
-          "date": "2024-10-07T05:15:55.217Z",
-          "type": "debit",
-          "amount": "9988.48",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2024-10-08T14:42:09.982Z",
-          "type": "debit",
-          "amount": "4657.19",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2024-10-09T20:37:16.634Z",
-          "type": "debit",
-          "amount": "5018.29",
-          "description": "Rent"
-        },
-        {
-          "date": "2024-10-31T22:23:07.937Z",
-          "type": "debit",
-          "amount": "8051.09",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2024-11-01T17:27:31.181Z",
-          "type": "debit",
-          "amount": "6829.00",
-          "description": "Rent"
-        },
-        {
-          "date": "2024-11-12T02:16:05.886Z",
-          "type": "debit",
-          "amount": "2431.06",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2024-11-13T11:51:34.925Z",
-          "type": "debit",
-          "amount": "4276.91",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2024-11-22T21:16:37.384Z",
-          "type": "debit",
-          "amount": "996.26",
-          "description": "Dining"
-        },
-        {
-          "date": "2024-11-23T19:10:02.168Z",
-          "type": "debit",
-          "amount": "592.12",
-          "description": "Grocery"
-        },
-        {
-          "date": "2024-11-26T07:10:29.127Z",
-          "type": "debit",
-          "amount": "4893.17",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2024-12-03T10:47:15.023Z",
-          "type": "credit",
-          "amount": "11855.64",
-          "description": "Bonus"
-        },
-        {
-          "date": "2024-12-03T19:48:48.086Z",
-          "type": "credit",
-          "amount": "49463.90",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2024-12-06T02:00:50.066Z",
-          "type": "debit",
-          "amount": "665.79",
-          "description": "Travel"
-        },
-        {
-          "date": "2024-12-14T14:04:27.064Z",
-          "type": "debit",
-          "amount": "5414.21",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2024-12-18T21:04:53.770Z",
-          "type": "debit",
-          "amount": "1972.79",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2024-12-21T21:29:46.002Z",
-          "type": "credit",
-          "amount": "42025.12",
-          "description": "Refund"
-        },
-        {
-          "date": "2024-12-31T03:44:04.968Z",
-          "type": "debit",
-          "amount": "669.36",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-01-01T07:19:12.276Z",
-          "type": "debit",
-          "amount": "2833.54",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-01-01T07:19:12.276Z",
-          "type": "debit",
-          "amount": "50000.54",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-01-06T04:06:14.640Z",
-          "type": "debit",
-          "amount": "785.83",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-01-09T08:12:59.363Z",
-          "type": "debit",
-          "amount": "6676.86",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-01-16T05:58:03.962Z",
-          "type": "debit",
-          "amount": "2022.67",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-02-03T15:17:52.746Z",
-          "type": "debit",
-          "amount": "9275.16",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-02-09T16:41:47.044Z",
-          "type": "credit",
-          "amount": "31065.43",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-02-12T09:42:47.800Z",
-          "type": "credit",
-          "amount": "7264.30",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-02-13T21:12:07.183Z",
-          "type": "credit",
-          "amount": "34774.95",
-          "description": "Bonus"
-        },
-        {
-          "date": "2025-02-22T07:33:28.890Z",
-          "type": "debit",
-          "amount": "9016.30",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-03-19T10:26:01.690Z",
-          "type": "debit",
-          "amount": "7413.76",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-03-28T13:17:41.731Z",
-          "type": "credit",
-          "amount": "2868.76",
-          "description": "Bonus"
-        },
-        {
-          "date": "2025-03-28T14:05:37.473Z",
-          "type": "debit",
-          "amount": "4494.90",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-03-31T02:08:44.836Z",
-          "type": "credit",
-          "amount": "24049.34",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-04-17T17:45:44.912Z",
-          "type": "credit",
-          "amount": "11631.00",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-05-08T10:40:03.880Z",
-          "type": "credit",
-          "amount": "32674.00",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-05-15T17:39:46.357Z",
-          "type": "debit",
-          "amount": "7254.86",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-05-18T05:13:52.192Z",
-          "type": "credit",
-          "amount": "24876.19",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-05-26T11:13:45.674Z",
-          "type": "debit",
-          "amount": "5544.37",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-06-04T18:56:29.874Z",
-          "type": "debit",
-          "amount": "2243.11",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-06-19T14:52:12.221Z",
-          "type": "debit",
-          "amount": "5963.89",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-06-21T07:34:18.478Z",
-          "type": "credit",
-          "amount": "2013.95",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-06-22T01:06:56.231Z",
-          "type": "credit",
-          "amount": "10571.77",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-07-02T11:59:21.426Z",
-          "type": "debit",
-          "amount": "3486.66",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-07-04T19:22:31.892Z",
-          "type": "debit",
-          "amount": "4126.36",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-07-04T23:36:40.737Z",
-          "type": "credit",
-          "amount": "49484.85",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-07-22T14:10:35.768Z",
-          "type": "debit",
-          "amount": "905.66",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-07-30T16:59:34.028Z",
-          "type": "debit",
-          "amount": "7379.51",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-07-31T19:35:19.435Z",
-          "type": "credit",
-          "amount": "44065.68",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-08-03T06:32:54.306Z",
-          "type": "debit",
-          "amount": "8413.10",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-08-06T00:24:47.314Z",
-          "type": "credit",
-          "amount": "17202.14",
-          "description": "Bonus"
-        },
-        {
-          "date": "2025-08-08T21:35:31.226Z",
-          "type": "debit",
-          "amount": "1543.26",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-08-17T05:49:00.418Z",
-          "type": "debit",
-          "amount": "1416.43",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-08-18T22:19:46.361Z",
-          "type": "debit",
-          "amount": "2142.61",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-08-19T00:26:34.662Z",
-          "type": "credit",
-          "amount": "13740.40",
-          "description": "Bonus"
-        },
-        {
-          "date": "2025-08-19T02:36:43.480Z",
-          "type": "debit",
-          "amount": "7428.10",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-08-21T20:45:10.746Z",
-          "type": "debit",
-          "amount": "8810.54",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-08-30T02:14:24.938Z",
-          "type": "debit",
-          "amount": "4002.60",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-09-07T01:18:15.386Z",
-          "type": "debit",
-          "amount": "870.94",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-09-07T05:14:51.587Z",
-          "type": "credit",
-          "amount": "35786.20",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-09-11T14:22:15.254Z",
-          "type": "debit",
-          "amount": "8711.94",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-09-14T15:45:08.760Z",
-          "type": "debit",
-          "amount": "1999.34",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-09-18T05:56:40.797Z",
-          "type": "credit",
-          "amount": "1465.46",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-09-24T04:28:21.650Z",
-          "type": "credit",
-          "amount": "42431.52",
-          "description": "Salary Credit"
-        }
-      ]
-    },
-    {
-      "bankName": "ICICI",
-      "accountNumber": "0209467112",
-      "balance": "41834.84",
-      "transactions": [
-        {
-          "date": "2024-10-02T22:27:54.045Z",
-          "type": "debit",
-          "amount": "6883.32",
-          "description": "Dining"
-        },
-        {
-          "date": "2024-10-08T10:33:38.041Z",
-          "type": "debit",
-          "amount": "8059.59",
-          "description": "Travel"
-        },
-        {
-          "date": "2024-10-08T21:29:45.265Z",
-          "type": "debit",
-          "amount": "8603.83",
-          "description": "Grocery"
-        },
-        {
-          "date": "2024-10-13T17:18:20.414Z",
-          "type": "debit",
-          "amount": "5872.11",
-          "description": "Grocery"
-        },
-        {
-          "date": "2024-10-15T09:17:55.856Z",
-          "type": "debit",
-          "amount": "6275.72",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2024-10-17T06:07:40.385Z",
-          "type": "debit",
-          "amount": "9216.08",
-          "description": "Grocery"
-        },
-        {
-          "date": "2024-10-18T21:08:58.367Z",
-          "type": "credit",
-          "amount": "24036.52",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2024-11-03T11:21:34.319Z",
-          "type": "credit",
-          "amount": "24777.21",
-          "description": "Bonus"
-        },
-        {
-          "date": "2024-11-12T09:15:20.499Z",
-          "type": "debit",
-          "amount": "1177.64",
-          "description": "Travel"
-        },
-        {
-          "date": "2024-11-14T20:23:01.191Z",
-          "type": "debit",
-          "amount": "4013.78",
-          "description": "Rent"
-        },
-        {
-          "date": "2024-11-15T00:10:42.564Z",
-          "type": "debit",
-          "amount": "5558.95",
-          "description": "Travel"
-        },
-        {
-          "date": "2024-11-16T09:26:35.495Z",
-          "type": "credit",
-          "amount": "31572.55",
-          "description": "Refund"
-        },
-        {
-          "date": "2024-11-27T16:27:46.529Z",
-          "type": "debit",
-          "amount": "6132.53",
-          "description": "Rent"
-        },
-        {
-          "date": "2024-12-06T02:09:37.189Z",
-          "type": "debit",
-          "amount": "3794.11",
-          "description": "Travel"
-        },
-        {
-          "date": "2024-12-19T12:08:15.437Z",
-          "type": "debit",
-          "amount": "4544.90",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-01-08T12:52:41.175Z",
-          "type": "credit",
-          "amount": "12031.71",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-01-13T23:03:43.227Z",
-          "type": "debit",
-          "amount": "3620.64",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-01-16T10:57:07.160Z",
-          "type": "debit",
-          "amount": "1237.71",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-01-18T09:47:32.781Z",
-          "type": "debit",
-          "amount": "9668.98",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-01-23T19:21:29.855Z",
-          "type": "debit",
-          "amount": "830.95",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-02-02T15:05:40.870Z",
-          "type": "debit",
-          "amount": "2715.21",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-02-23T10:15:36.810Z",
-          "type": "credit",
-          "amount": "1613.81",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-03-01T08:45:33.694Z",
-          "type": "debit",
-          "amount": "8002.89",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-03-02T01:12:45.315Z",
-          "type": "debit",
-          "amount": "8157.80",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-03-08T21:37:06.017Z",
-          "type": "debit",
-          "amount": "4209.96",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-03-11T15:19:28.752Z",
-          "type": "debit",
-          "amount": "4976.63",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-03-13T18:43:06.248Z",
-          "type": "debit",
-          "amount": "9335.29",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-03-20T08:45:52.050Z",
-          "type": "debit",
-          "amount": "9826.87",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-03-21T14:20:56.336Z",
-          "type": "debit",
-          "amount": "9497.57",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-03-26T11:28:10.635Z",
-          "type": "debit",
-          "amount": "6093.05",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-04-13T01:30:49.760Z",
-          "type": "debit",
-          "amount": "7630.62",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-04-29T10:05:05.787Z",
-          "type": "debit",
-          "amount": "8075.81",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-05-01T13:06:22.634Z",
-          "type": "credit",
-          "amount": "33962.82",
-          "description": "Bonus"
-        },
-        {
-          "date": "2025-05-12T11:30:40.023Z",
-          "type": "debit",
-          "amount": "9851.72",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-06-07T01:52:39.851Z",
-          "type": "debit",
-          "amount": "4094.78",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-06-07T05:12:02.274Z",
-          "type": "debit",
-          "amount": "2434.87",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-06-26T21:23:19.501Z",
-          "type": "credit",
-          "amount": "16638.65",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-07-07T08:29:23.406Z",
-          "type": "debit",
-          "amount": "5374.62",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-07-13T08:12:19.582Z",
-          "type": "debit",
-          "amount": "1746.31",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-07-14T03:18:36.020Z",
-          "type": "debit",
-          "amount": "5346.87",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-07-19T15:11:45.132Z",
-          "type": "debit",
-          "amount": "4148.61",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-07-20T10:04:39.549Z",
-          "type": "debit",
-          "amount": "8847.20",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-07-28T18:09:37.015Z",
-          "type": "debit",
-          "amount": "3115.21",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-08-05T01:15:20.007Z",
-          "type": "credit",
-          "amount": "31934.64",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-08-13T19:36:09.139Z",
-          "type": "debit",
-          "amount": "5601.18",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-08-15T07:29:36.846Z",
-          "type": "debit",
-          "amount": "1461.52",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-08-19T15:29:43.704Z",
-          "type": "debit",
-          "amount": "4469.26",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-08-19T16:13:42.753Z",
-          "type": "debit",
-          "amount": "6754.83",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-08-25T00:36:56.351Z",
-          "type": "debit",
-          "amount": "4825.46",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-09-01T08:47:26.550Z",
-          "type": "credit",
-          "amount": "49015.82",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-09-04T17:41:27.641Z",
-          "type": "debit",
-          "amount": "2599.10",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-09-05T09:41:40.316Z",
-          "type": "debit",
-          "amount": "7037.95",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-09-06T03:51:21.863Z",
-          "type": "credit",
-          "amount": "26568.59",
-          "description": "Bonus"
-        },
-        {
-          "date": "2025-09-09T14:00:56.688Z",
-          "type": "debit",
-          "amount": "6486.08",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-09-09T16:54:12.551Z",
-          "type": "debit",
-          "amount": "2098.13",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-09-13T09:00:48.601Z",
-          "type": "debit",
-          "amount": "3876.41",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-09-14T02:17:11.210Z",
-          "type": "debit",
-          "amount": "1312.87",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-09-15T04:48:05.857Z",
-          "type": "debit",
-          "amount": "1630.00",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-09-17T08:03:04.721Z",
-          "type": "debit",
-          "amount": "7244.13",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-09-27T20:39:08.350Z",
-          "type": "credit",
-          "amount": "22466.70",
-          "description": "Salary Credit"
-        }
-      ]
-    },
-    {
-      "bankName": "SBI",
-      "accountNumber": "6512158206",
-      "balance": "475624.35",
-      "transactions": [
-        {
-          "date": "2024-10-13T15:19:08.898Z",
-          "type": "credit",
-          "amount": "41702.70",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2024-10-16T18:04:23.773Z",
-          "type": "debit",
-          "amount": "4767.98",
-          "description": "Dining"
-        },
-        {
-          "date": "2024-10-30T11:06:16.242Z",
-          "type": "debit",
-          "amount": "4162.56",
-          "description": "Travel"
-        },
-        {
-          "date": "2024-11-02T11:33:00.976Z",
-          "type": "credit",
-          "amount": "34490.39",
-          "description": "Bonus"
-        },
-        {
-          "date": "2024-11-02T23:18:00.088Z",
-          "type": "debit",
-          "amount": "3121.04",
-          "description": "Grocery"
-        },
-        {
-          "date": "2024-11-09T04:46:53.440Z",
-          "type": "credit",
-          "amount": "24285.03",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2024-11-27T12:59:24.860Z",
-          "type": "credit",
-          "amount": "49999.27",
-          "description": "Refund"
-        },
-        {
-          "date": "2024-11-28T04:30:40.688Z",
-          "type": "debit",
-          "amount": "1250.11",
-          "description": "Grocery"
-        },
-        {
-          "date": "2024-12-04T12:55:17.076Z",
-          "type": "debit",
-          "amount": "8584.84",
-          "description": "Travel"
-        },
-        {
-          "date": "2024-12-14T02:50:46.271Z",
-          "type": "credit",
-          "amount": "12635.44",
-          "description": "Refund"
-        },
-        {
-          "date": "2024-12-15T03:01:41.952Z",
-          "type": "debit",
-          "amount": "6303.46",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2024-12-17T13:58:27.902Z",
-          "type": "debit",
-          "amount": "9459.98",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2024-12-20T06:15:34.383Z",
-          "type": "debit",
-          "amount": "743.46",
-          "description": "Dining"
-        },
-        {
-          "date": "2024-12-23T18:13:19.029Z",
-          "type": "debit",
-          "amount": "2080.23",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-01-12T08:55:25.199Z",
-          "type": "credit",
-          "amount": "49785.23",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-01-21T10:49:56.940Z",
-          "type": "credit",
-          "amount": "45266.71",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-01-25T12:40:58.112Z",
-          "type": "debit",
-          "amount": "3739.26",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-01-25T13:24:49.220Z",
-          "type": "debit",
-          "amount": "7709.05",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-01-27T00:48:14.691Z",
-          "type": "debit",
-          "amount": "9152.58",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-01-29T18:02:11.556Z",
-          "type": "debit",
-          "amount": "4852.01",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-01-31T18:49:24.865Z",
-          "type": "credit",
-          "amount": "44196.33",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-02-19T04:30:52.349Z",
-          "type": "credit",
-          "amount": "39024.48",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-03-01T14:35:02.276Z",
-          "type": "credit",
-          "amount": "9353.78",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-03-02T00:35:55.651Z",
-          "type": "debit",
-          "amount": "7487.31",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-03-03T23:25:03.425Z",
-          "type": "debit",
-          "amount": "9411.41",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-03-04T04:17:51.860Z",
-          "type": "credit",
-          "amount": "35767.31",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-03-04T06:58:25.945Z",
-          "type": "credit",
-          "amount": "32594.00",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-03-08T04:16:08.140Z",
-          "type": "debit",
-          "amount": "2050.71",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-03-23T11:32:03.591Z",
-          "type": "credit",
-          "amount": "15507.58",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-03-26T01:09:37.278Z",
-          "type": "debit",
-          "amount": "5215.79",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-03-28T12:13:56.191Z",
-          "type": "debit",
-          "amount": "892.63",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-04-06T07:08:00.409Z",
-          "type": "debit",
-          "amount": "3930.39",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-04-20T01:02:13.981Z",
-          "type": "debit",
-          "amount": "9345.21",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-04-21T06:36:55.526Z",
-          "type": "debit",
-          "amount": "8846.65",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-05-01T20:44:16.171Z",
-          "type": "debit",
-          "amount": "8011.45",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-05-05T11:50:12.948Z",
-          "type": "debit",
-          "amount": "9345.38",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-05-09T06:36:37.803Z",
-          "type": "credit",
-          "amount": "1199.99",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-05-09T12:02:16.573Z",
-          "type": "debit",
-          "amount": "9797.39",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-06-01T09:38:21.921Z",
-          "type": "debit",
-          "amount": "8137.67",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-06-09T02:02:25.661Z",
-          "type": "credit",
-          "amount": "48384.13",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-06-10T09:04:48.589Z",
-          "type": "credit",
-          "amount": "3773.69",
-          "description": "Bonus"
-        },
-        {
-          "date": "2025-06-11T18:40:21.640Z",
-          "type": "debit",
-          "amount": "1366.51",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-06-14T14:56:43.084Z",
-          "type": "debit",
-          "amount": "6606.52",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-06-17T07:30:15.631Z",
-          "type": "credit",
-          "amount": "9057.31",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-06-29T09:50:07.308Z",
-          "type": "credit",
-          "amount": "16304.58",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-07-08T12:22:25.771Z",
-          "type": "debit",
-          "amount": "3317.56",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-07-24T15:00:05.725Z",
-          "type": "debit",
-          "amount": "9849.39",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-07-27T19:03:13.612Z",
-          "type": "debit",
-          "amount": "6352.77",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-08-12T22:20:05.917Z",
-          "type": "credit",
-          "amount": "2265.14",
-          "description": "Bonus"
-        },
-        {
-          "date": "2025-08-14T01:31:34.343Z",
-          "type": "credit",
-          "amount": "48778.33",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-08-19T11:44:04.164Z",
-          "type": "credit",
-          "amount": "48419.88",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-08-20T03:42:17.555Z",
-          "type": "debit",
-          "amount": "9223.28",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-08-22T02:10:12.871Z",
-          "type": "credit",
-          "amount": "21670.25",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-08-22T14:06:59.967Z",
-          "type": "debit",
-          "amount": "6209.44",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-09-13T19:45:12.910Z",
-          "type": "credit",
-          "amount": "18768.74",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-09-23T11:44:27.065Z",
-          "type": "debit",
-          "amount": "4099.12",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-09-23T16:55:30.904Z",
-          "type": "debit",
-          "amount": "887.35",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-09-29T14:03:08.317Z",
-          "type": "debit",
-          "amount": "8820.50",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-09-30T12:30:33.754Z",
-          "type": "debit",
-          "amount": "4531.47",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-10-01T04:35:41.586Z",
-          "type": "debit",
-          "amount": "8546.80",
-          "description": "Grocery"
-        }
-      ]
-    },
-    {
-      "bankName": "Axis",
-      "accountNumber": "9793012850",
-      "balance": "276553.10",
-      "transactions": [
-        {
-          "date": "2024-10-03T05:44:11.317Z",
-          "type": "debit",
-          "amount": "2179.21",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2024-10-03T08:35:37.029Z",
-          "type": "debit",
-          "amount": "849.37",
-          "description": "Rent"
-        },
-        {
-          "date": "2024-10-21T21:00:03.558Z",
-          "type": "credit",
-          "amount": "36735.58",
-          "description": "Refund"
-        },
-        {
-          "date": "2024-10-28T16:36:44.855Z",
-          "type": "debit",
-          "amount": "7975.37",
-          "description": "Travel"
-        },
-        {
-          "date": "2024-11-01T19:21:48.940Z",
-          "type": "debit",
-          "amount": "5287.28",
-          "description": "Grocery"
-        },
-        {
-          "date": "2024-11-06T17:30:43.889Z",
-          "type": "credit",
-          "amount": "23938.65",
-          "description": "Refund"
-        },
-        {
-          "date": "2024-11-09T07:54:31.160Z",
-          "type": "debit",
-          "amount": "1253.07",
-          "description": "Dining"
-        },
-        {
-          "date": "2024-11-14T02:56:08.867Z",
-          "type": "debit",
-          "amount": "3079.03",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2024-11-26T09:41:39.451Z",
-          "type": "debit",
-          "amount": "6511.90",
-          "description": "Dining"
-        },
-        {
-          "date": "2024-11-30T01:50:32.217Z",
-          "type": "credit",
-          "amount": "11085.99",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2024-12-28T08:01:14.579Z",
-          "type": "credit",
-          "amount": "5795.48",
-          "description": "Bonus"
-        },
-        {
-          "date": "2024-12-30T12:18:19.064Z",
-          "type": "debit",
-          "amount": "7164.11",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-01-03T21:57:03.225Z",
-          "type": "credit",
-          "amount": "16662.24",
-          "description": "Bonus"
-        },
-        {
-          "date": "2025-01-07T04:13:49.570Z",
-          "type": "debit",
-          "amount": "7055.86",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-01-08T10:05:45.641Z",
-          "type": "debit",
-          "amount": "1569.09",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-01-11T10:24:53.885Z",
-          "type": "debit",
-          "amount": "7657.58",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-01-19T06:06:33.551Z",
-          "type": "debit",
-          "amount": "4878.27",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-01-21T12:22:11.671Z",
-          "type": "debit",
-          "amount": "8806.31",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-01-23T07:57:19.582Z",
-          "type": "debit",
-          "amount": "7556.95",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-01-29T16:23:10.472Z",
-          "type": "debit",
-          "amount": "7768.48",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-02-07T10:23:58.842Z",
-          "type": "debit",
-          "amount": "7094.85",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-02-16T07:00:02.824Z",
-          "type": "debit",
-          "amount": "6789.95",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-02-17T02:44:15.413Z",
-          "type": "credit",
-          "amount": "42479.29",
-          "description": "Bonus"
-        },
-        {
-          "date": "2025-02-17T19:40:31.570Z",
-          "type": "debit",
-          "amount": "5229.89",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-02-17T22:16:08.991Z",
-          "type": "debit",
-          "amount": "2025.09",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-02-25T00:22:24.738Z",
-          "type": "debit",
-          "amount": "5971.85",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-03-04T15:44:07.491Z",
-          "type": "debit",
-          "amount": "9770.28",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-03-23T10:48:48.845Z",
-          "type": "credit",
-          "amount": "22860.23",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-04-04T12:32:27.776Z",
-          "type": "credit",
-          "amount": "24760.12",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-04-11T14:58:33.374Z",
-          "type": "debit",
-          "amount": "1593.87",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-04-12T07:47:23.850Z",
-          "type": "debit",
-          "amount": "5438.24",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-04-16T05:31:49.430Z",
-          "type": "credit",
-          "amount": "38345.22",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-04-28T19:11:20.484Z",
-          "type": "debit",
-          "amount": "2426.27",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-05-05T20:51:04.064Z",
-          "type": "credit",
-          "amount": "33338.96",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-05-07T12:06:32.618Z",
-          "type": "debit",
-          "amount": "9685.94",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-05-12T10:29:26.188Z",
-          "type": "debit",
-          "amount": "4586.56",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-05-28T19:05:03.003Z",
-          "type": "debit",
-          "amount": "4766.42",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-05-31T02:10:37.603Z",
-          "type": "debit",
-          "amount": "2756.67",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-06-17T08:25:47.316Z",
-          "type": "credit",
-          "amount": "16696.69",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-06-22T12:15:09.502Z",
-          "type": "debit",
-          "amount": "9493.40",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-06-23T02:14:56.811Z",
-          "type": "debit",
-          "amount": "7083.01",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-06-24T22:55:26.684Z",
-          "type": "debit",
-          "amount": "7459.86",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-06-27T04:39:30.272Z",
-          "type": "debit",
-          "amount": "7889.92",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-07-02T23:15:49.061Z",
-          "type": "credit",
-          "amount": "29379.81",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-07-05T22:24:26.887Z",
-          "type": "credit",
-          "amount": "18442.17",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-07-10T09:21:07.264Z",
-          "type": "debit",
-          "amount": "6460.96",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-07-16T22:28:08.092Z",
-          "type": "credit",
-          "amount": "23516.02",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-07-31T18:04:36.622Z",
-          "type": "debit",
-          "amount": "8688.25",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-08-07T07:59:22.916Z",
-          "type": "debit",
-          "amount": "1911.81",
-          "description": "Online Shopping"
-        },
-        {
-          "date": "2025-08-09T20:02:38.205Z",
-          "type": "credit",
-          "amount": "3887.47",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-08-12T14:26:41.918Z",
-          "type": "debit",
-          "amount": "6775.58",
-          "description": "Dining"
-        },
-        {
-          "date": "2025-08-13T19:47:56.360Z",
-          "type": "credit",
-          "amount": "40784.24",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-08-29T11:51:04.781Z",
-          "type": "debit",
-          "amount": "9053.82",
-          "description": "Grocery"
-        },
-        {
-          "date": "2025-09-09T20:30:21.289Z",
-          "type": "debit",
-          "amount": "6921.45",
-          "description": "Travel"
-        },
-        {
-          "date": "2025-09-10T02:56:21.494Z",
-          "type": "credit",
-          "amount": "21399.35",
-          "description": "Salary Credit"
-        },
-        {
-          "date": "2025-09-11T10:53:39.772Z",
-          "type": "credit",
-          "amount": "23749.72",
-          "description": "Transfer from Wallet"
-        },
-        {
-          "date": "2025-09-13T06:25:03.215Z",
-          "type": "debit",
-          "amount": "1950.44",
-          "description": "Rent"
-        },
-        {
-          "date": "2025-09-13T20:44:38.812Z",
-          "type": "credit",
-          "amount": "28172.25",
-          "description": "Refund"
-        },
-        {
-          "date": "2025-09-17T03:57:35.052Z",
-          "type": "debit",
-          "amount": "3145.37",
-          "description": "Electricity Bill"
-        },
-        {
-          "date": "2025-09-30T10:50:00.470Z",
-          "type": "debit",
-          "amount": "3790.00",
-          "description": "Rent"
-        }
-      ]
-    }
-  ],
-  "creditScore": [
-    {
-      "date": "2024-11-07T13:42:25.376Z",
-      "score": 708
-    },
-    {
-      "date": "2024-12-05T01:27:56.709Z",
-      "score": 693
-    },
-    {
-      "date": "2024-12-16T17:03:00.555Z",
-      "score": 720
-    },
-    {
-      "date": "2024-12-23T09:20:06.165Z",
-      "score": 710
-    },
-    {
-      "date": "2025-02-23T09:40:43.526Z",
-      "score": 695
-    },
-    {
-      "date": "2025-03-02T15:12:43.141Z",
-      "score": 711
-    },
-    {
-      "date": "2025-03-21T15:58:25.290Z",
-      "score": 704
-    },
-    {
-      "date": "2025-04-15T21:03:55.643Z",
-      "score": 683
-    },
-    {
-      "date": "2025-06-10T08:38:36.573Z",
-      "score": 710
-    },
-    {
-      "date": "2025-07-12T14:35:55.690Z",
-      "score": 707
-    },
-    {
-      "date": "2025-07-22T05:11:42.775Z",
-      "score": 689
-    },
-    {
-      "date": "2025-08-03T02:24:53.674Z",
-      "score": 704
-    }
-  ],
-  "loans": [
-    {
-      "loanType": "Home Loan",
-      "principal": 1200000,
-      "interestRate": 7.25,
-      "startDate": "2025-03-26T01:50:35.258Z",
-      "endDate": "2032-12-25T14:33:28.097Z",
-      "monthlyEMI": 14088,
-      "outstandingAmount": 1091522
-    }
-  ],
-  "mutualFunds": [
-    {
-      "fundName": "Murray, Beahan and Braun Growth Fund",
-      "units": 35.72035729185444,
-      "nav": 228.54774758683303,
-      "date": "2025-10-01T09:17:16.654Z"
-    },
-    {
-      "fundName": "Fadel - Quigley Growth Fund",
-      "units": 71.25083613913985,
-      "nav": 91.1189454334187,
-      "date": "2025-09-21T10:11:59.315Z"
-    },
-    {
-      "fundName": "Frami - Hane Growth Fund",
-      "units": 51.29585988548609,
-      "nav": 110.01848277879,
-      "date": "2025-09-05T06:03:59.301Z"
-    },
-    {
-      "fundName": "Wunsch and Sons Growth Fund",
-      "units": 11.205352829768028,
-      "nav": 203.08756118381476,
-      "date": "2025-09-16T23:24:08.580Z"
-    },
-    {
-      "fundName": "Stark, Mayert and Pollich Growth Fund",
-      "units": 114.17841241810267,
-      "nav": 247.9746387745389,
-      "date": "2025-09-30T01:31:13.748Z"
-    },
-    {
-      "fundName": "Pouros Group Growth Fund",
-      "units": 95.75009685508554,
-      "nav": 125.28904963234085,
-      "date": "2025-09-28T01:36:42.857Z"
-    },
-    {
-      "fundName": "Schoen, Lebsack and Hansen Growth Fund",
-      "units": 127.84815728428896,
-      "nav": 71.18246753132844,
-      "date": "2025-09-10T18:38:40.910Z"
-    },
-    {
-      "fundName": "Baumbach, Roberts and Reichert Growth Fund",
-      "units": 128.52589889230384,
-      "nav": 203.4212941120265,
-      "date": "2025-09-28T02:03:20.041Z"
-    }
-  ],
-  "stocks": [
-    {
-      "symbol": "TCS",
-      "quantity": 83,
-      "avgBuyPrice": "1259.81",
-      "currentPrice": "1738.17",
-      "date": "2025-09-26T10:21:08.761Z"
-    },
-    {
-      "symbol": "INFY",
-      "quantity": 85,
-      "avgBuyPrice": "1222.92",
-      "currentPrice": "999.46",
-      "date": "2025-09-17T22:16:10.485Z"
-    },
-    {
-      "symbol": "RELIANCE",
-      "quantity": 75,
-      "avgBuyPrice": "1784.58",
-      "currentPrice": "1470.93",
-      "date": "2025-08-22T00:17:36.989Z"
-    },
-    {
-      "symbol": "HDFCBANK",
-      "quantity": 63,
-      "avgBuyPrice": "2341.67",
-      "currentPrice": "1984.11",
-      "date": "2025-10-01T09:13:10.513Z"
-    },
-    {
-      "symbol": "LT",
-      "quantity": 19,
-      "avgBuyPrice": "949.75",
-      "currentPrice": "789.93",
-      "date": "2025-09-09T04:33:04.786Z"
-    },
-    {
-      "symbol": "ITC",
-      "quantity": 96,
-      "avgBuyPrice": "2323.13",
-      "currentPrice": "2788.01",
-      "date": "2025-09-20T15:46:52.651Z"
-    }
-  ],
-  "insurance": [
-    {
-      "policyName": "Life Shield",
-      "provider": "LIC",
-      "premium": 15000,
-      "coverageAmount": 1000000,
-      "startDate": "2023-10-20T05:33:51.105Z",
-      "endDate": "2027-07-30T19:58:09.932Z",
-      "type": "life"
-    },
-    {
-      "policyName": "Health Secure",
-      "provider": "Star Health",
-      "premium": 10000,
-      "coverageAmount": 700000,
-      "startDate": "2024-12-15T05:20:55.534Z",
-      "endDate": "2025-12-19T09:05:28.586Z",
-      "type": "health"
-    }
-  ]
-}
-'''
-    data = json.loads(imported_data)
-    transactions = []
-    # Process all transactions from all banks
-    for bank in data['banks']:
+    columns: Dict[str, List[Any]] = {name: [] for name in TRANSACTION_COLUMNS}
+    dates = columns["date"]
+    amounts = columns["amount"]
+    types = columns["type"]
+    descriptions = columns["description"]
+    banks = columns["bank"]
+
+    for bank in data.get('banks') or []:
         if not isinstance(bank, dict) or 'transactions' not in bank:
             continue  # Skip if bank doesn't have required structure
-        
+
+        bank_name = bank.get('bankName')
         for txn in bank['transactions']:
-            try:
-                # Convert amount to float and date to datetime
-                txn['amount'] = float(txn['amount'])
-                txn['date'] = pd.to_datetime(txn['date'])
-                txn['type'] = txn['type'].lower()
-                txn['bank'] = bank['bankName']
-                transactions.append(txn)
-            except Exception as e:
-                # Skip malformed transactions
-                continue
-
-    # Convert to DataFrame
-    df = pd.DataFrame(transactions)
-    
+            if not isinstance(txn, dict):
+                txn = {}  # Keep the row so it is counted as rejected
+            dates.append(txn.get('date'))
+            amounts.append(txn.get('amount'))
+            types.append(txn.get('type'))
+            descriptions.append(txn.get('description'))
+            banks.append(bank_name)
+
+    return columns
+
+
+def ingest_transaction_list(transactions: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Columnar lists for a flat list of transactions that each carry a ``bank``.
+
+    Args:
+        transactions: Transactions in the stored schema plus a ``bank`` key
+
+    Returns:
+        Mapping of column name to a list of raw values, as ``ingest_transactions``
+    """
+    rows = [txn if isinstance(txn, dict) else {} for txn in transactions]
+    return {name: [txn.get(name) for txn in rows] for name in TRANSACTION_COLUMNS}
+
+
+def normalize_transactions(columns: Dict[str, List[Any]]) -> Tuple[pd.DataFrame, int]:
+    """
+    Parse dates, amounts and types column-wise and drop malformed rows.
+
+    Args:
+        columns: Raw columns as returned by ``ingest_transactions``
+
+    Returns:
+        Tuple of (normalized DataFrame, number of rejected rows)
+    """
+    df = pd.DataFrame(columns)
     if df.empty:
-        return []
+        return df, 0
+
+    df['date'] = pd.to_datetime(df['date'], format='ISO8601', errors='coerce', utc=True)
+    df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+    try:
+        # Non-string types become NaN instead of raising
+        df['type'] = df['type'].str.lower()
+    except AttributeError:
+        # The column holds no strings at all, so every row is malformed
+        df['type'] = None
+
+    # "Infinity" and overflowing amounts parse to inf; they are as malformed as NaN
+    valid = df['date'].notna() & np.isfinite(df['amount']) & df['type'].notna()
+    rejected = int((~valid).sum())
+    if rejected:
+        df = df[valid].reset_index(drop=True)
+
+    df['amount'] = df['amount'].astype(float)
+    return df, rejected
+
+
+def run_anomaly_detection(data: Dict[str, Any], user_id: Optional[str] = None, tier: Optional[str] = None,
+                          offset: int = 0, limit: Optional[int] = None,
+                          since: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Run the anomaly pipeline and return the anomalies with run statistics.
+
+    Args:
+        data: Financial data containing banks and their transactions
+        user_id: When given, the fitted model is cached per user and reused
+            until the user's transactions change
+        tier: Force ``"robust"``, ``"isolation_forest"`` or ``"streaming"``
+            instead of choosing by size; histories longer than
+            ``ANOMALY_STREAMING_MIN_ROWS`` are streamed in chunks, which
+            bounds the derived frames but not ``data``, already in memory
+        offset: Number of anomalies to skip, ordered by amount descending
+        limit: Maximum number of anomalies to return, or None for all
+        since: Only score transactions after this watermark; earlier ones
+            still shape the statistics they are scored against
+
+    Returns:
+        Dict with the page of anomalies, the total count, the number of
+        rejected rows, the detector tier used and the watermark (date of
+        the latest transaction seen)
+    """
+    if tier == TIER_STREAMING or (tier is None and _count_transactions(data) > ANOMALY_STREAMING_MIN_ROWS):
+        # Imported here since the streaming detector builds on this module
+        from utils.streaming_detection import detect_anomalies_streaming, iter_transactions_by_date
+        return detect_anomalies_streaming(lambda: iter_transactions_by_date(data), offset=offset, limit=limit,
+                                          since=since)
+
+    df, rejected = normalize_transactions(ingest_transactions(data))
+    result = score_transactions(df, user_id, tier, offset, limit, emis=loan_emis(data), since=since)
+    result["rejected"] = rejected
+    return result
+
+
+def loan_emis(data: Dict[str, Any]) -> Dict[str, float]:
+    """Monthly EMI per loan type from the ``loans`` section, skipping malformed entries."""
+    emis = {}
+    for loan in data.get("loans") or []:
+        if not isinstance(loan, dict):
+            continue
+        try:
+            emis[str(loan.get("loanType") or "Loan")] = float(loan["monthlyEMI"])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return emis
+
+
+def _count_transactions(data: Dict[str, Any]) -> int:
+    return sum(
+        len(bank['transactions']) for bank in data.get('banks') or []
+        if isinstance(bank, dict) and isinstance(bank.get('transactions'), list)
+    )
+
+
+def detect_anomalies(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Detect anomalies in transaction data using robust statistics for small
+    histories and Z-score plus Isolation Forest for larger ones.
     
-    # Filter for debit transactions only (as anomalies are typically high-value debits)
-    debits = df[df['type'] == 'debit'].copy()
+    Args:
+        data: Financial data containing banks and their transactions
+        
+    Returns:
+        List of anomalies with details
+    """
+    return run_anomaly_detection(data)["anomalies"]
+
+
+def transaction_fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """
+    One uint64 hash per transaction, used to version a user's data set.
+    """
+    return pd.util.hash_pandas_object(df[list(TRANSACTION_COLUMNS)], index=False).to_numpy()
+
+
+def build_feature_matrix(debits: pd.DataFrame) -> pd.DataFrame:
+    """
+    Contextual features per debit, built with whole-column and groupby transforms.
+
+    The category is the normalized description. Bank and category are
+    encoded as their share of all debits, so rare ones stand out to the
+    Isolation Forest. Hour and weekday are taken in ``ANOMALY_TIMEZONE``.
+    ``days_since_category`` is the gap to the previous debit in the same
+    category; a category's first debit gets the length of the whole history.
+
+    Args:
+        debits: Debits with date, amount, description and bank columns
+
+    Returns:
+        Frame indexed like ``debits`` with the ``FEATURE_COLUMNS``
+    """
+    amounts = debits['amount'].astype(float)
+    local = debits['date'].dt.tz_convert(ANOMALY_TIMEZONE)
+    category = normalize_descriptions(debits['description'])
+    bank = debits['bank'].fillna("").astype(str)
+
+    by_category = amounts.groupby(category)
+    mean = by_category.transform('mean')
+    std = by_category.transform('std', ddof=0)
+    category_zscore = ((amounts - mean) / std.where(std > 0)).fillna(0.0)
+
+    dates = debits['date']
+    previous = dates.sort_values(kind='stable').groupby(category).shift().reindex(debits.index)
+    days_since = (dates - previous).dt.total_seconds() / 86400
+    history_days = (dates.max() - dates.min()).total_seconds() / 86400 if len(dates) else 0.0
+
+    return pd.DataFrame({
+        'amount': amounts,
+        'log_amount': np.log1p(amounts.clip(lower=0)),
+        'hour': local.dt.hour + local.dt.minute / 60,
+        'weekday': local.dt.weekday,
+        'bank_share': bank.map(bank.value_counts(normalize=True)),
+        'category_share': category.map(category.value_counts(normalize=True)),
+        'category_zscore': category_zscore,
+        'days_since_category': days_since.fillna(history_days),
+    }, index=debits.index)
+
+
+def _fit_isolation_forest(features: pd.DataFrame) -> IsolationForest:
+    iso_forest = IsolationForest(contamination=0.1, random_state=42)  # Adjusted contamination
+    return iso_forest.fit(features)
+
+
+def select_tier(n_debits: int, tier: Optional[str] = None) -> str:
+    """
+    Pick the detector tier for a user with ``n_debits`` debit transactions.
+
+    Small histories get exact robust statistics in NumPy; IsolationForest is
+    only used above ``ANOMALY_FAST_PATH_MAX_ROWS`` or when asked for explicitly.
+    """
+    if tier is not None:
+        if tier not in (TIER_ROBUST, TIER_ISOLATION_FOREST):
+            raise ValueError(f"Unknown detector tier: {tier}")
+        return tier
+    return TIER_ROBUST if n_debits <= ANOMALY_FAST_PATH_MAX_ROWS else TIER_ISOLATION_FOREST
+
+
+def _robust_scores(amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Median/MAD z-scores and a two-sided quantile test on a 1-D amount column.
+
+    Returns:
+        Tuple of (robust z-scores, mask of amounts outside the quantile range)
+    """
+    median = np.median(amounts)
+    deviations = np.abs(amounts - median)
+    mad = np.median(deviations)
+    if mad > 0:
+        robust_z = 0.6745 * (amounts - median) / mad
+    else:
+        # More than half the amounts are identical; fall back to the mean deviation
+        mean_deviation = deviations.mean()
+        robust_z = (amounts - median) / (1.2533 * mean_deviation) if mean_deviation > 0 else np.zeros_like(amounts)
+
+    low, high = np.quantile(amounts, [QUANTILE_TAIL, 1 - QUANTILE_TAIL])
+    return robust_z, (amounts < low) | (amounts > high)
+
+
+def _robust_context(debits: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Median/MAD z-score of each debit within its category, and rare-hour mask.
+
+    The category is the normalized description; categories with fewer than
+    ``ROBUST_CATEGORY_MIN_COUNT`` debits score 0. The hour is taken in
+    ``ANOMALY_TIMEZONE`` and is rare when it holds less than
+    ``RARE_HOUR_SHARE`` of the debits.
+
+    Returns:
+        Tuple of (category z-scores, mask of debits at a rare hour)
+    """
+    amounts = debits['amount'].astype(float)
+    category = normalize_descriptions(debits['description'])
+    median = amounts.groupby(category).transform('median')
+    deviations = (amounts - median).abs()
+    mad = deviations.groupby(category).transform('median')
+    # Same fallback as _robust_scores when most of a category's amounts are identical
+    scale = (mad / 0.6745).where(mad > 0, 1.2533 * deviations.groupby(category).transform('mean'))
+    enough = category.map(category.value_counts()) >= ROBUST_CATEGORY_MIN_COUNT
+    category_z = ((amounts - median) / scale.where(scale > 0)).where(enough).fillna(0.0)
+
+    hour = debits['date'].dt.tz_convert(ANOMALY_TIMEZONE).dt.hour
+    rare_hour = hour.map(hour.value_counts(normalize=True)) < RARE_HOUR_SHARE
+    return category_z.to_numpy(), rare_hour.to_numpy()
+
+
+def score_transactions(df: pd.DataFrame, user_id: Optional[str] = None, tier: Optional[str] = None,
+                       offset: int = 0, limit: Optional[int] = None,
+                       emis: Optional[Dict[str, float]] = None,
+                       since: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Score normalized transactions and format the flagged debits.
+
+    Debits that belong to a recurring series (rent, bills, loan EMIs) are
+    expected, so they are left out of the amount-based outlier scoring and
+    only go through the pattern detectors. The robust tier also flags debits
+    unusually large for their category, with a lower bar at an hour the user
+    rarely spends at, so context is not lost on small histories.
+
+    Args:
+        df: Transactions as returned by ``normalize_transactions``
+        user_id: When given, the fitted model is cached per user
+        tier: Force a detector tier instead of choosing one by size
+        offset: Number of anomalies to skip, ordered by amount descending
+        limit: Maximum number of anomalies to return, or None for all
+        emis: Loan type -> monthly EMI, as returned by ``loan_emis``
+        since: Only score debits after this watermark; earlier ones still
+            feed the statistics, the fitted model and the pattern windows
+
+    Returns:
+        Dict with the page of anomalies, the total count, the tier used,
+        the recurring series found and the watermark
+    """
+    debits = df[df['type'] == 'debit'].copy() if not df.empty else df
+    watermark = latest_date(debits, since)
+    tier = select_tier(len(debits), tier)
     
     if debits.empty:
-        return []
-    
-    # Step 1: Z-score anomaly detection
-    debits['zscore'] = zscore(debits['amount'])
-    debits['zscore_anomaly'] = debits['zscore'].abs() > 1.5  # Using 3 instead of 25 for more sensitivity
+        return {"anomalies": [], "count": 0, "tier": tier, "recurring": [], "watermark": watermark}
+    fresh = (debits['date'] > since).to_numpy() if since is not None else np.ones(len(debits), dtype=bool)
+
+    # Step 0: Recurring series are expected payments, not outliers
+    periods, recurring = find_recurring_payments(debits, emis)
+    debits['recurring_period'] = periods
+    expected = debits['recurring_period'].notna().to_numpy()
+    scored = debits[~expected]
     
-    # Step 2: Isolation Forest anomaly detection
-    iso_forest = IsolationForest(contamination=0.1, random_state=42)  # Adjusted contamination
-    debits['iso_anomaly'] = iso_forest.fit_predict(debits[['amount']])
-    debits['iso_anomaly'] = debits['iso_anomaly'] == -1
+    debits['zscore'] = np.nan
+    context = {}
+    if tier == TIER_ROBUST:
+        # Step 1: Robust (median/MAD) Z-score and quantile range, NumPy only
+        flags = ROBUST_REASONS
+        context = ROBUST_CONTEXT_REASONS
+        debits[list(flags) + list(context)] = False
+        if not scored.empty:
+            robust_z, outside_range = _robust_scores(scored['amount'].to_numpy())
+            debits.loc[~expected, 'zscore'] = robust_z
+            debits.loc[~expected, 'zscore_anomaly'] = np.abs(robust_z) > ROBUST_ZSCORE_THRESHOLD
+            debits.loc[~expected, 'range_anomaly'] = outside_range
+
+            # Step 2: Only unusually large for the category, or fairly large at a rare hour
+            category_z, rare_hour = _robust_context(scored)
+            unusual = (category_z > ROBUST_ZSCORE_THRESHOLD) | ((category_z > ROBUST_RARE_HOUR_ZSCORE) & rare_hour)
+            debits.loc[~expected, 'category_anomaly'] = unusual
+            debits.loc[~expected, 'hour_anomaly'] = unusual & rare_hour
+    else:
+        flags = ISOLATION_FOREST_REASONS
+        debits[list(flags)] = False
+        if not scored.empty:
+            # Step 1: Z-score anomaly detection, overall and within the debit's category
+            features = build_feature_matrix(scored)
+            scores = zscore(scored['amount'])
+            debits.loc[~expected, 'zscore'] = scores
+            debits.loc[~expected, 'zscore_anomaly'] = (
+                (np.abs(scores) > 1.5)  # Using 3 instead of 25 for more sensitivity
+                | (features['category_zscore'] > 1.5)  # Only unusually large for the category
+            )
+
+            # Step 2: Isolation Forest anomaly detection on the contextual features
+            if user_id is None:
+                iso_forest = _fit_isolation_forest(features)
+            else:
+                iso_forest = model_registry.get_or_fit(
+                    user_id, "iforest-context", transaction_fingerprints(scored),
+                    lambda: _fit_isolation_forest(features)
+                )
+            # Only debits past the watermark need a prediction
+            predict = fresh[~expected]
+            if predict.any():
+                debits.loc[~expected & fresh, 'iso_anomaly'] = iso_forest.predict(features[predict]) == -1
     
     # Step 3: Combine both methods
-    debits['is_anomaly'] = debits['zscore_anomaly'] & debits['iso_anomaly']
-    
-    # Step 4: Add reason for anomaly
-    def detect_reason(row):
-        reasons = []
-        if row['zscore_anomaly']:
-            reasons.append("Unusual transaction amount (Z-score)")
-        if row['iso_anomaly']:
-            reasons.append("Unusual pattern detected (Isolation Forest)")
-        return "; ".join(reasons)
-    
-    debits['reason'] = debits.apply(detect_reason, axis=1)
+    debits['is_anomaly'] = debits[list(flags)].all(axis=1)
+    if context:
+        debits['is_anomaly'] |= debits['category_anomaly']
+
+    # Step 4: Pattern detectors that flag debits regardless of amount
+    debits['duplicate_anomaly'] = find_duplicate_charges(debits)
+    debits['velocity_anomaly'] = find_velocity_bursts(debits)
+    debits['is_anomaly'] |= debits[list(PATTERN_REASONS)].any(axis=1)
+    debits['is_anomaly'] &= fresh
     
     # Step 5: Format output
     anomalies = debits[debits['is_anomaly']]
-    
-    if anomalies.empty:
-        return []
-    
-    # Format anomalies as list of dictionaries
-    anomaly_list = []
-    for _, row in anomalies.iterrows():
-        anomaly = {
-            'date': row['date'].isoformat(),
-            'amount': row['amount'],
-            'description': row['description'],
-            'bank': row['bank'],
-            'reason': row['reason'],
-            'zscore': float(row['zscore']) if not pd.isna(row['zscore']) else None
-        }
-        anomaly_list.append(anomaly)
-    
-    # Sort by amount in descending order
-    anomaly_list.sort(key=lambda x: x['amount'], reverse=True)
-    
-    return anomaly_list
\ No newline at end of file
+    result = format_anomalies(anomalies, {**flags, **context, **PATTERN_REASONS}, offset, limit)
+    result["tier"] = tier
+    result["recurring"] = recurring
+    result["watermark"] = watermark
+    return result
+
+
+def latest_date(df: pd.DataFrame, since: Optional[datetime] = None) -> Optional[str]:
+    """ISO date of the latest transaction in ``df``, never earlier than ``since``, or None."""
+    dates = [date for date in (df['date'].max() if not df.empty else None, since) if date is not None]
+    return max(pd.Timestamp(date) for date in dates).isoformat() if dates else None
+
+
+def normalize_descriptions(descriptions: pd.Series) -> pd.Series:
+    """Lower-cased descriptions with surrounding and repeated whitespace removed."""
+    return descriptions.fillna("").astype(str).str.strip().str.lower().str.replace(r"\s+", " ", regex=True)
+
+
+def find_duplicate_charges(debits: pd.DataFrame,
+                           window_minutes: float = ANOMALY_DUPLICATE_WINDOW_MINUTES) -> np.ndarray:
+    """
+    Flag repeat debits with the same bank, description and amount in a window.
+
+    Rows are hashed on (bank, normalized description, amount in paise) and
+    sorted by (hash, time) once, so each bucket's charges are adjacent and in
+    time order. A charge is a duplicate when the previous charge in its bucket
+    is at most ``window_minutes`` older. O(n log n), no pairwise comparison.
+
+    Returns:
+        Boolean mask aligned with ``debits``; the first charge of a burst
+        of repeats is not flagged, every later one is
+    """
+    n = len(debits)
+    if n < 2:
+        return np.zeros(n, dtype=bool)
+
+    keys = pd.util.hash_pandas_object(pd.DataFrame({
+        'bank': debits['bank'].fillna("").astype(str).to_numpy(),
+        'description': normalize_descriptions(debits['description']).to_numpy(),
+        'paise': np.rint(debits['amount'].to_numpy(dtype=float) * 100).astype(np.int64),
+    }), index=False).to_numpy()
+    times = debits['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+    order = np.lexsort((times, keys))
+    sorted_keys = keys[order]
+    sorted_times = times[order]
+    window_ns = int(window_minutes * 60 * 1e9)
+    repeat = (sorted_keys[1:] == sorted_keys[:-1]) & (sorted_times[1:] - sorted_times[:-1] <= window_ns)
+
+    duplicates = np.zeros(n, dtype=bool)
+    duplicates[order[1:][repeat]] = True
+    return duplicates
+
+
+def _period_labels(gaps: np.ndarray) -> np.ndarray:
+    """Name each median gap (in days) after the closest recurrence period, or None if none is close."""
+    names = np.array(list(RECURRING_PERIODS), dtype=object)
+    days = np.array(list(RECURRING_PERIODS.values()))
+    relative = np.abs(gaps[:, None] - days[None, :]) / days[None, :]
+    closest = relative.argmin(axis=1)
+    return np.where(relative[np.arange(gaps.size), closest] <= RECURRING_PERIOD_TOLERANCE, names[closest], None)
+
+
+def find_recurring_payments(debits: pd.DataFrame, emis: Optional[Dict[str, float]] = None,
+                            min_occurrences: int = ANOMALY_RECURRING_MIN_OCCURRENCES,
+                            tolerance: float = ANOMALY_RECURRING_AMOUNT_TOLERANCE
+                            ) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """
+    Label debits that belong to a recurring series, such as rent, bills or EMIs.
+
+    Debits are grouped by normalized description into amount bands: sorted by
+    amount, a new band starts wherever the next amount is more than
+    ``tolerance`` above the previous one. Within each band, inter-arrival
+    gaps come from a single sort by time. A band is a recurring series when
+    it has at least ``min_occurrences`` debits, most gaps sit close to the
+    median gap, and that median matches a named period. Debits at a loan's
+    ``monthlyEMI`` are monthly payments, whatever their count.
+
+    Args:
+        debits: Debits with date, amount and description columns
+        emis: Loan type -> monthly EMI
+        min_occurrences: Smallest series worth calling recurring
+        tolerance: Relative amount spread allowed inside one band
+
+    Returns:
+        The period label per debit (None when not recurring), and one
+        summary per series with description, amount, period, period_days,
+        count and last_date
+    """
+    n = len(debits)
+    periods = np.full(n, None, dtype=object)
+    series: List[Dict[str, Any]] = []
+    if n == 0:
+        return periods, series
+
+    descriptions = normalize_descriptions(debits['description']).to_numpy()
+    desc_codes, _ = pd.factorize(descriptions)
+    amounts = debits['amount'].to_numpy(dtype=float)
+    times = debits['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+    # Amount bands within each description
+    by_amount = np.lexsort((amounts, desc_codes))
+    sorted_amounts = amounts[by_amount]
+    new_band = np.ones(n, dtype=bool)
+    new_band[1:] = ((desc_codes[by_amount][1:] != desc_codes[by_amount][:-1])
+                    | (sorted_amounts[1:] > sorted_amounts[:-1] * (1 + tolerance)))
+    bands = np.empty(n, dtype=np.int64)
+    bands[by_amount] = np.cumsum(new_band) - 1
+
+    # Inter-arrival gaps within each band
+    by_time = np.lexsort((times, bands))
+    gaps = pd.Series(np.diff(times[by_time], prepend=times[by_time][0]) / 86400e9)
+    band_of = pd.Series(bands[by_time])
+    gaps[np.r_[True, band_of.to_numpy()[1:] != band_of.to_numpy()[:-1]]] = np.nan
+    grouped = gaps.groupby(band_of.to_numpy())
+    median_gap = grouped.transform('median')
+    regular = ((gaps - median_gap).abs() <= median_gap * RECURRING_GAP_JITTER).astype(float).where(gaps.notna())
+
+    stats = pd.DataFrame({
+        'count': band_of.groupby(band_of.to_numpy()).size(),
+        'median_gap': grouped.median(),
+        'regular_share': regular.groupby(band_of.to_numpy()).mean(),
+    })
+    stats['period'] = _period_labels(stats['median_gap'].fillna(0).to_numpy())
+    stats = stats[(stats['count'] >= min_occurrences) & (stats['regular_share'] >= RECURRING_MIN_REGULAR_SHARE)
+                  & stats['period'].notna()]
+    periods[:] = pd.Series(bands).map(stats['period']).to_numpy(dtype=object)
+    periods[pd.isna(periods)] = None
+
+    if not stats.empty:
+        members = pd.DataFrame({'band': bands, 'description': debits['description'].to_numpy(),
+                                'amount': amounts, 'date': debits['date'].to_numpy()})
+        members = members[members['band'].isin(stats.index)]
+        summary = members.groupby('band').agg(description=('description', 'first'), amount=('amount', 'median'),
+                                              last_date=('date', 'max'))
+        summary = summary.join(stats)
+        series.extend({
+            "description": description,
+            "amount": round(amount, 2),
+            "period": period,
+            "period_days": round(gap, 1),
+            "count": count,
+            "last_date": last_date.isoformat(),
+        } for description, amount, period, gap, count, last_date in zip(
+            summary['description'], summary['amount'].tolist(), summary['period'],
+            summary['median_gap'].tolist(), summary['count'].tolist(), summary['last_date']
+        ))
+
+    # Loan EMIs are expected even before a full series has been seen
+    for loan_type, emi in (emis or {}).items():
+        matched = (np.abs(amounts - emi) <= EMI_AMOUNT_TOLERANCE) & pd.isna(periods)
+        if matched.any():
+            periods[matched] = "monthly"
+            series.append({
+                "description": f"{loan_type} EMI",
+                "amount": round(float(emi), 2),
+                "period": "monthly",
+                "period_days": RECURRING_PERIODS["monthly"],
+                "count": int(matched.sum()),
+                "last_date": debits['date'][matched].max().isoformat(),
+            })
+    return periods, series
+
+
+def _window_bursts(times: np.ndarray, amounts: np.ndarray, window_ns: int,
+                   max_count: int, max_amount: float) -> np.ndarray:
+    """
+    Sliding-window burst test over timestamps that are already sorted.
+
+    For each debit, ``searchsorted`` finds the first debit at most
+    ``window_ns`` older; a prefix sum gives the window's total. A debit is
+    flagged once its window holds more than ``max_count`` debits, or at
+    least two debits totalling more than ``max_amount``.
+    """
+    starts = np.searchsorted(times, times - window_ns, side='left')
+    counts = np.arange(1, times.size + 1) - starts
+    totals = np.concatenate([[0.0], np.cumsum(amounts)])
+    window_amounts = totals[1:] - totals[starts]
+    return (counts > max_count) | ((counts >= 2) & (window_amounts > max_amount))
+
+
+def find_velocity_bursts(debits: pd.DataFrame,
+                         window_minutes: float = ANOMALY_VELOCITY_WINDOW_MINUTES,
+                         max_count: int = ANOMALY_VELOCITY_MAX_COUNT,
+                         max_amount: float = ANOMALY_VELOCITY_MAX_AMOUNT) -> np.ndarray:
+    """
+    Flag debits that complete a burst, per bank or across all banks.
+
+    A burst is more than ``max_count`` debits, or more than ``max_amount``
+    rupees over two or more debits, within ``window_minutes``. Both checks
+    run on sorted timestamp arrays. For the per-bank check, each bank's
+    timestamps are shifted past the previous bank's, so one pass never lets
+    a window span two banks.
+
+    Returns:
+        Boolean mask aligned with ``debits``
+    """
+    n = len(debits)
+    flagged = np.zeros(n, dtype=bool)
+    if n < 2:
+        return flagged
+
+    times = debits['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    amounts = debits['amount'].to_numpy(dtype=float)
+    window_ns = int(window_minutes * 60 * 1e9)
+
+    # Across all banks
+    order = np.argsort(times, kind='stable')
+    flagged[order] |= _window_bursts(times[order], amounts[order], window_ns, max_count, max_amount)
+
+    # Per bank
+    bank_codes, _ = pd.factorize(debits['bank'].fillna("").astype(str))
+    gap = int(times.max() - times.min()) + 2 * window_ns
+    shifted = (times - times.min()) + bank_codes.astype(np.int64) * gap
+    order = np.argsort(shifted, kind='stable')
+    flagged[order] |= _window_bursts(shifted[order], amounts[order], window_ns, max_count, max_amount)
+    return flagged
+
+
+def _reasons(frame: pd.DataFrame, flags: Dict[str, str]) -> np.ndarray:
+    """Join the reason of every set flag column, built with boolean masks."""
+    reasons = np.full(len(frame), "", dtype=object)
+    for column, reason in flags.items():
+        mask = frame[column].to_numpy(dtype=bool)
+        joined = np.where(reasons == "", reason, reasons + "; " + reason)
+        reasons = np.where(mask, joined, reasons)
+    return reasons
+
+
+def _top_amounts(amounts: np.ndarray, offset: int, limit: Optional[int]) -> np.ndarray:
+    """
+    Positions of the ``offset:offset+limit`` largest amounts, largest first.
+
+    Only the first ``offset + limit`` amounts are fully sorted; the rest are
+    discarded with ``argpartition``.
+    """
+    n = amounts.size
+    k = n if limit is None else min(n, offset + limit)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(-amounts, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    order = candidates[np.argsort(-amounts[candidates], kind='stable')]
+    return order[offset:k]
+
+
+def format_anomalies(anomalies: pd.DataFrame, flags: Dict[str, str],
+                     offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Serialize flagged debits, sorted by amount in descending order.
+
+    Args:
+        anomalies: Flagged debits with the flag columns named in ``flags``
+        flags: Flag column -> reason text
+        offset: Number of anomalies to skip
+        limit: Maximum number of anomalies to return, or None for all
+
+    Returns:
+        Dict with the requested page of anomalies and the total count
+    """
+    amounts = anomalies['amount'].to_numpy(dtype=float)
+    selected = anomalies.iloc[_top_amounts(amounts, offset, limit)]
+
+    columns = {
+        'date': [date.isoformat() for date in selected['date']],
+        'amount': selected['amount'].tolist(),
+        'description': selected['description'].tolist(),
+        'bank': selected['bank'].tolist(),
+        'reason': _reasons(selected, flags).tolist(),
+        'zscore': [None if math.isnan(z) else z for z in selected['zscore'].to_numpy(dtype=float).tolist()],
+    }
+    keys = list(columns)
+    return {
+        "anomalies": [dict(zip(keys, row)) for row in zip(*columns.values())],
+        "count": len(anomalies),
+    }
@@ -0,0 +1,76 @@
+"""
+In-process pub/sub for pushing new anomalies to connected dashboards
+
+Each connection gets its own bounded queue. Publishing never blocks: when a
+slow client's queue is full its oldest event is dropped. An idle connection
+is just a coroutine waiting on its queue, so it costs no detector work.
+"""
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Set
+
+from config import ANOMALY_EVENT_BUFFER_SIZE
+
+
+class Subscription:
+    """One connection's bounded event buffer."""
+
+    def __init__(self, max_events: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_events)
+        self.dropped = 0
+
+    def push(self, event: Dict[str, Any]):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def next(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+
+class AnomalyBroker:
+    """
+    Fan-out of anomaly events to every subscription of a user.
+
+    Only used from the event loop thread, so it needs no locking.
+    """
+
+    def __init__(self, max_events: int = ANOMALY_EVENT_BUFFER_SIZE):
+        self.max_events = max_events
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    @contextmanager
+    def subscribe(self, user_id: str) -> Iterator[Subscription]:
+        subscription = Subscription(self.max_events)
+        self._subscriptions[user_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscriptions.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[user_id]
+
+    def publish(self, user_id: str, anomalies: List[Dict[str, Any]], source: str) -> int:
+        """
+        Push one event per anomaly to the user's subscriptions.
+
+        Returns:
+            Number of subscriptions the events were delivered to
+        """
+        subscriptions = self._subscriptions.get(user_id)
+        if not subscriptions or not anomalies:
+            return 0
+        for subscription in subscriptions:
+            for anomaly in anomalies:
+                subscription.push({"source": source, "anomaly": anomaly})
+        return len(subscriptions)
+
+    def subscriber_count(self, user_id: str) -> int:
+        return len(self._subscriptions.get(user_id, ()))
+
+
+anomaly_broker = AnomalyBroker()
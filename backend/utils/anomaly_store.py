@@ -0,0 +1,106 @@
+"""
+Stored anomaly results and the per-user scoring watermark
+
+Anomalies live in their own collection, one document per flagged debit.
+The watermark is the date of the latest transaction already scored for a
+user; later runs only score transactions after it. Nothing here imports
+pandas, so reads stay cheap.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from db.db import anomalies_collection, anomaly_watermarks_collection
+
+# Fields that identify a stored anomaly; the unique index on them makes re-runs idempotent
+ANOMALY_KEY_FIELDS = ("user_id", "date", "bank", "description", "amount")
+
+
+async def ensure_indexes():
+    """Create the anomaly collection's indexes if they do not exist yet."""
+    # Its (user_id, date) prefix also serves the date-range reads
+    await anomalies_collection.create_index(
+        [(field, ASCENDING) for field in ANOMALY_KEY_FIELDS], unique=True, name="user_date_key"
+    )
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+async def get_watermark(user_id: str) -> Optional[datetime]:
+    """Date of the latest transaction already scored for a user, or None."""
+    doc = await anomaly_watermarks_collection.find_one({"_id": ObjectId(user_id)})
+    # Mongo hands back naive UTC datetimes
+    return doc["watermark"].replace(tzinfo=timezone.utc) if doc else None
+
+
+async def save_anomalies(user_id: str, anomalies: List[Dict[str, Any]], watermark: Optional[str]) -> int:
+    """
+    Store newly detected anomalies and advance the user's watermark.
+
+    Args:
+        user_id: Owner of the anomalies
+        anomalies: Anomalies as formatted by ``format_anomalies``
+        watermark: ISO date of the latest transaction scored in this run
+
+    Returns:
+        Number of anomalies that were not stored before
+    """
+    owner = ObjectId(user_id)
+    detected_at = datetime.utcnow()
+    stored = 0
+    if anomalies:
+        operations = []
+        for anomaly in anomalies:
+            doc = {**anomaly, "user_id": owner, "date": _parse_date(anomaly["date"])}
+            key = {field: doc[field] for field in ANOMALY_KEY_FIELDS}
+            operations.append(UpdateOne(key, {"$setOnInsert": {**doc, "detected_at": detected_at}}, upsert=True))
+        result = await anomalies_collection.bulk_write(operations, ordered=False)
+        stored = result.upserted_count
+
+    if watermark:
+        # $max keeps the watermark from moving backwards when runs overlap
+        await anomaly_watermarks_collection.update_one(
+            {"_id": owner},
+            {"$max": {"watermark": _parse_date(watermark)}, "$set": {"updated_at": detected_at}},
+            upsert=True
+        )
+    return stored
+
+
+async def find_anomalies(user_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+    """
+    Page through a user's stored anomalies, newest first.
+
+    Args:
+        user_id: Owner of the anomalies
+        start: Only anomalies on or after this date
+        end: Only anomalies before this date
+        offset: Number of anomalies to skip
+        limit: Maximum number of anomalies to return
+
+    Returns:
+        Dict with the page of anomalies and the total count matching the filters
+    """
+    query: Dict[str, Any] = {"user_id": ObjectId(user_id)}
+    if start is not None or end is not None:
+        query["date"] = {}
+        if start is not None:
+            query["date"]["$gte"] = start
+        if end is not None:
+            query["date"]["$lt"] = end
+
+    cursor = (anomalies_collection.find(query, {"_id": 0, "user_id": 0, "detected_at": 0})
+              .sort([("date", DESCENDING), ("amount", DESCENDING)])
+              .skip(offset)
+              .limit(limit))
+    anomalies = []
+    async for doc in cursor:
+        doc["date"] = doc["date"].replace(tzinfo=timezone.utc).isoformat()
+        anomalies.append(doc)
+    count = await anomalies_collection.count_documents(query)
+    return {"anomalies": anomalies, "count": count}
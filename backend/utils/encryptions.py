@@ -1,14 +1,50 @@
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives import hashes, hmac
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.backends import default_backend
+from bson import Binary
+from config import FINANCIAL_COMPRESSION, FINANCIAL_COMPRESSION_LEVEL
 import base64
 import os
 import json
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
 
 # Use a fixed key stored in your .env or config
 # Must be 32 bytes for AES-256
 ENCRYPTION_KEY = bytes.fromhex("b7895e2a9fef45c6ac8a42b19e10a81aef7bd4fd27a6d74250ab0f343f29b3cd")
 
+# Formats of the encrypted payload in a financial record, stored in its "version" field
+# 1: AES-256-CBC, base64 strings in "iv" and "encrypted_data" (records without a version)
+# 2: AES-256-GCM, raw bytes in "nonce" and "ciphertext", authenticated against the owner's id;
+#    a "compression" field names the codec the plaintext was compressed with, if any
+# 3: as 2, but each top-level section (banks, loans, ...) is sealed on its own under
+#    "sections.<name>", so readers can fetch and decrypt only the sections they need
+LEGACY_RECORD_VERSION = 1
+WHOLE_RECORD_VERSION = 2
+SECTIONED_RECORD_VERSION = 3
+RECORD_VERSION = SECTIONED_RECORD_VERSION
+
+# Top-level sections of a user's financial data
+FINANCIAL_SECTIONS = ("banks", "creditScore", "loans", "mutualFunds", "stocks", "insurance")
+
+COMPRESSION_CODECS = ("zlib", "zstd")
+
+# Separate keys for content hashes and blind indexes, so a hash never doubles as anything
+# keyed by ENCRYPTION_KEY
+CONTENT_HASH_KEY = HKDF(
+    algorithm=hashes.SHA256(), length=32, salt=None, info=b"financial-snapshot-content-hash"
+).derive(ENCRYPTION_KEY)
+BLIND_INDEX_KEY = HKDF(
+    algorithm=hashes.SHA256(), length=32, salt=None, info=b"financial-blind-index"
+).derive(ENCRYPTION_KEY)
+
 def encrypt_data(data: dict) -> dict:
     iv = os.urandom(16)
     backend = default_backend()
@@ -41,3 +77,142 @@ def decrypt_data(encrypted_data_b64: str, iv_b64: str) -> dict:
     decrypted_data = unpadder.update(decrypted_padded) + unpadder.finalize()
 
     return json.loads(decrypted_data.decode())
+
+def compress_payload(payload: bytes, codec: str, level: int = None) -> bytes:
+    if codec == "zlib":
+        return zlib.compress(payload, -1 if level is None else level)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression needs the zstandard package")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(payload)
+    raise ValueError(f"Unsupported compression codec: {codec}")
+
+def decompress_payload(payload: bytes, codec: str) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise ValueError(f"Unsupported compression codec: {codec}")
+
+def _seal(value, associated_data: bytes, compression: str, level: int) -> dict:
+    plaintext = json.dumps(value, separators=(",", ":")).encode()
+    if compression != "none":
+        plaintext = compress_payload(plaintext, compression, level)
+    nonce = os.urandom(12)
+    return {
+        "nonce": Binary(nonce),
+        "ciphertext": Binary(AESGCM(ENCRYPTION_KEY).encrypt(nonce, plaintext, associated_data))
+    }
+
+def _open_plaintext(sealed: dict, associated_data: bytes, compression: str) -> bytes:
+    plaintext = AESGCM(ENCRYPTION_KEY).decrypt(bytes(sealed["nonce"]), bytes(sealed["ciphertext"]), associated_data)
+    if compression:
+        plaintext = decompress_payload(plaintext, compression)
+    return plaintext
+
+def _open(sealed: dict, associated_data: bytes, compression: str):
+    return json.loads(_open_plaintext(sealed, associated_data, compression))
+
+def _section_associated_data(associated_data: bytes, section: str) -> bytes:
+    return associated_data + b":" + section.encode()
+
+def encrypt_record(data: dict, associated_data: bytes, compression: str = FINANCIAL_COMPRESSION,
+                   level: int = FINANCIAL_COMPRESSION_LEVEL, version: int = RECORD_VERSION) -> dict:
+    """
+    Encrypt data into the payload fields of a record.
+
+    ``associated_data`` (the owner's id) is authenticated but not stored in
+    the ciphertext, so a payload copied into another user's record fails to
+    decrypt. The JSON is compressed first unless ``compression`` is "none";
+    transaction lists repeat the same keys and shrink several times over.
+    Version 3 seals each top-level section separately, with the section
+    name added to the associated data so sections cannot be swapped.
+    """
+    if compression not in COMPRESSION_CODECS and compression != "none":
+        raise ValueError(f"Unsupported compression codec: {compression}")
+    header = {"version": version}
+    if compression != "none":
+        header["compression"] = compression
+
+    if version == SECTIONED_RECORD_VERSION:
+        return {
+            **header,
+            "sections": {
+                name: _seal(value, _section_associated_data(associated_data, name), compression, level)
+                for name, value in data.items()
+            }
+        }
+    if version == WHOLE_RECORD_VERSION:
+        return {**header, **_seal(data, associated_data, compression, level)}
+    raise ValueError(f"Unsupported financial record version: {version}")
+
+def decrypt_record_payload(record: dict, associated_data: bytes, sections=None) -> dict:
+    """
+    Decrypt the payload of a record in any supported version.
+
+    With ``sections``, only those top-level sections are returned; version 3
+    records decrypt and parse nothing else.
+    """
+    return decrypt_record_payload_sized(record, associated_data, sections)[0]
+
+def decrypt_record_payload_sized(record: dict, associated_data: bytes, sections=None) -> tuple:
+    """
+    ``decrypt_record_payload`` plus the number of JSON bytes it parsed, a
+    size estimate for caches that costs no extra serialization.
+    """
+    version = record.get("version", LEGACY_RECORD_VERSION)
+    if version == SECTIONED_RECORD_VERSION:
+        stored = record["sections"]
+        names = stored.keys() if sections is None else [name for name in sections if name in stored]
+        data, size = {}, 0
+        for name in names:
+            plaintext = _open_plaintext(
+                stored[name], _section_associated_data(associated_data, name), record.get("compression")
+            )
+            data[name] = json.loads(plaintext)
+            size += len(plaintext)
+        return data, size
+
+    if version == LEGACY_RECORD_VERSION:
+        data = decrypt_data(encrypted_data_b64=record["encrypted_data"], iv_b64=record["iv"])
+        # Base64 of the padded plaintext
+        size = len(record["encrypted_data"]) * 3 // 4
+    elif version == WHOLE_RECORD_VERSION:
+        plaintext = _open_plaintext(record, associated_data, record.get("compression"))
+        data = json.loads(plaintext)
+        size = len(plaintext)
+    else:
+        raise ValueError(f"Unsupported financial record version: {version}")
+    if sections is None:
+        return data, size
+    return {name: data[name] for name in sections if name in data}, size
+
+def seal_value(value, associated_data: bytes) -> dict:
+    """Encrypt one small JSON value, e.g. a single transaction, into nonce/ciphertext fields."""
+    return _seal(value, associated_data, "none", None)
+
+def open_value(sealed: dict, associated_data: bytes):
+    """Decrypt a value sealed by ``seal_value``."""
+    return _open(sealed, associated_data, None)
+
+def blind_index(value: str) -> str:
+    """
+    Keyed hash of a normalized value, so equality filters can run in Mongo
+    without storing the value itself in the clear.
+    """
+    mac = hmac.HMAC(BLIND_INDEX_KEY, hashes.SHA256())
+    mac.update(value.strip().lower().encode())
+    return mac.finalize().hex()
+
+def content_hash(data: dict) -> str:
+    """
+    Keyed hash (HMAC-SHA256) of data's canonical JSON.
+
+    Equal data always hashes the same, whatever the key order. Being keyed,
+    the stored hash cannot be used to confirm guesses of the plaintext.
+    """
+    mac = hmac.HMAC(CONTENT_HASH_KEY, hashes.SHA256())
+    mac.update(json.dumps(data, sort_keys=True, separators=(",", ":")).encode())
+    return mac.finalize().hex()
@@ -0,0 +1,269 @@
+"""
+Helpers for reading users' encrypted financial records
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from config import FINANCIAL_CACHE_SIZE, FINANCIAL_CACHE_TTL, FINANCIAL_CACHE_MAX_BYTES
+from db.db import financial_collection
+from utils.encryptions import (
+    FINANCIAL_SECTIONS, LEGACY_RECORD_VERSION, SECTIONED_RECORD_VERSION, content_hash, decrypt_record_payload,
+    decrypt_record_payload_sized, encrypt_record
+)
+from utils.result_cache import TTLCache
+
+# Sections the anomaly detectors read: transactions and loan EMIs
+ANOMALY_SECTIONS = ("banks", "loans")
+
+
+async def ensure_indexes():
+    """Create the financial collection's indexes if they do not exist yet."""
+    # Serves every "latest record of a user" lookup and the retention job
+    await financial_collection.create_index(
+        [("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_latest"
+    )
+
+
+async def save_snapshot(user_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Store a user's financial data as a new snapshot, unless it is unchanged.
+
+    Snapshots are addressed by ``content_hash`` of the plaintext. When it
+    matches the latest snapshot's, only that snapshot's ``last_consented_at``
+    is bumped; otherwise a new encrypted snapshot is inserted with the next
+    snapshot number.
+
+    Returns:
+        Dict with the snapshot number, its record id, whether it is new and
+        whether its transactions are already stored individually
+    """
+    owner = ObjectId(user_id)
+    now = datetime.utcnow()
+    digest = content_hash(data)
+    latest = await financial_collection.find_one(
+        {"user_id": owner}, {"_id": 1, "content_hash": 1, "snapshot": 1, "transactions_indexed": 1},
+        sort=[("created_at", -1)]
+    )
+    if latest is not None and latest.get("content_hash") == digest:
+        await financial_collection.update_one(
+            {"_id": latest["_id"]},
+            {"$set": {"last_consented_at": now, "consent_given": True}}
+        )
+        return {"snapshot": latest.get("snapshot", 1), "record_id": latest["_id"], "created": False,
+                "transactions_indexed": bool(latest.get("transactions_indexed"))}
+
+    # Encrypt data, bound to the owner so it cannot be replayed for another user
+    encrypted = await asyncio.to_thread(encrypt_record, data, record_associated_data(owner))
+    snapshot = (latest.get("snapshot", 1) + 1) if latest is not None else 1
+    result = await financial_collection.insert_one({
+        "user_id": owner,
+        **encrypted,
+        "content_hash": digest,
+        "snapshot": snapshot,
+        "consent_given": True,
+        "created_at": now,
+        "last_consented_at": now
+    })
+    return {"snapshot": snapshot, "record_id": result.inserted_id, "created": True, "transactions_indexed": False}
+
+
+def section_projection(sections: Optional[Iterable[str]]) -> Optional[Dict[str, int]]:
+    """
+    Projection that leaves out the ciphertext of sections not in ``sections``.
+
+    Only sectioned records have per-section fields; older records come back
+    whole and are filtered after decryption.
+    """
+    if sections is None:
+        return None
+    wanted = set(sections)
+    return {f"sections.{name}": 0 for name in FINANCIAL_SECTIONS if name not in wanted} or None
+
+
+async def fetch_latest_record(user_id: str, sections: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+    """Latest stored financial record for a user, or None; ``sections`` limits what is transferred."""
+    return await financial_collection.find_one(
+        {"user_id": ObjectId(user_id)},
+        section_projection(sections),
+        sort=[("created_at", -1)]  # in case you store multiple versions
+    )
+
+
+async def fetch_latest_fields(user_id: str, fields: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """Only the ids and ``fields`` of a user's latest record, or None; no ciphertext is transferred."""
+    return await financial_collection.find_one(
+        {"user_id": ObjectId(user_id)},
+        {"user_id": 1, **{field: 1 for field in fields}},
+        sort=[("created_at", -1)]
+    )
+
+
+async def fetch_record(record_id: ObjectId, sections: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+    """Stored financial record by id, or None; ``sections`` limits what is transferred."""
+    return await financial_collection.find_one({"_id": record_id}, section_projection(sections))
+
+
+async def fetch_latest_records(user_ids: List[str],
+                               sections: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Latest stored financial record for each of many users.
+
+    One aggregation over the ``user_latest`` index picks each user's latest
+    record id, without touching the ciphertext; the winning records are then
+    fetched in one query.
+
+    Returns:
+        Mapping of user id string to record; users without a record are absent
+    """
+    pipeline = [
+        {"$match": {"user_id": {"$in": [ObjectId(user_id) for user_id in user_ids]}}},
+        {"$sort": {"user_id": 1, "created_at": -1}},
+        {"$group": {"_id": "$user_id", "record_id": {"$first": "$_id"}}},
+    ]
+    record_ids = [doc["record_id"] async for doc in financial_collection.aggregate(pipeline, allowDiskUse=True)]
+    if not record_ids:
+        return {}
+    cursor = financial_collection.find({"_id": {"$in": record_ids}}, section_projection(sections))
+    return {str(record["user_id"]): record async for record in cursor}
+
+
+async def fetch_consented_user_ids() -> List[str]:
+    """Ids of every user that has given consent to store financial data."""
+    user_ids = await financial_collection.distinct("user_id", {"consent_given": True})
+    return [str(user_id) for user_id in user_ids]
+
+
+def record_associated_data(user_id: Any) -> bytes:
+    """Bytes a record's ciphertext is bound to: its owner's id."""
+    return str(user_id).encode()
+
+
+def decrypt_record(record: Dict[str, Any], sections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Decrypt the financial data stored in a record of any format version, or only ``sections`` of it."""
+    return decrypt_record_payload(record, record_associated_data(record["user_id"]), sections)
+
+
+def _cached_size(entry: Dict[str, Any]) -> int:
+    # Plaintext JSON size, a stable stand-in for the parsed objects' footprint, measured while decrypting
+    return entry["size"]
+
+
+# Decrypted sections per (user id, record id). A new consent creates a new
+# record id, so stale entries are never served; /consent also drops them early.
+record_cache = TTLCache(FINANCIAL_CACHE_SIZE, FINANCIAL_CACHE_TTL, FINANCIAL_CACHE_MAX_BYTES, _cached_size)
+
+
+def invalidate_cached_records(user_id: str) -> int:
+    """Drop every cached decrypted record of a user."""
+    return record_cache.pop_matching(lambda key: key[0] == str(user_id))
+
+
+def _covers(entry: Optional[Dict[str, Any]], sections: Optional[List[str]]) -> bool:
+    if entry is None:
+        return False
+    if entry["complete"]:
+        return True
+    return sections is not None and all(name in entry["sections"] or name in entry["absent"] for name in sections)
+
+
+def _missing_sections(entry: Optional[Dict[str, Any]], sections: Optional[List[str]]) -> Optional[List[str]]:
+    """Sections still to decrypt for a request; None means the whole record."""
+    if sections is None:
+        return None
+    cached = entry["sections"] if entry else {}
+    return [name for name in sections if name not in cached]
+
+
+def _decrypt_into_entry(record: Dict[str, Any], entry: Optional[Dict[str, Any]],
+                        missing: Optional[List[str]]) -> Dict[str, Any]:
+    """Decrypt ``missing`` sections of a record and merge them into a copy of its cache entry."""
+    entry = entry or {"sections": {}, "absent": frozenset(), "complete": False, "size": 0}
+    if record.get("version", LEGACY_RECORD_VERSION) < SECTIONED_RECORD_VERSION:
+        # Older formats are one blob: decrypting any of it decrypts all of it
+        missing = None
+    decrypted, size = decrypt_record_payload_sized(record, record_associated_data(record["user_id"]), missing)
+    return {
+        "sections": {**entry["sections"], **decrypted},
+        "absent": entry["absent"] | frozenset(name for name in missing or () if name not in decrypted),
+        "complete": missing is None,
+        "size": entry["size"] + size,
+    }
+
+
+def _select(entry: Dict[str, Any], sections: Optional[List[str]]) -> Dict[str, Any]:
+    if sections is None:
+        return dict(entry["sections"])
+    return {name: entry["sections"][name] for name in sections if name in entry["sections"]}
+
+
+def _cached_entry(key: Tuple[str, ObjectId], sections: Optional[List[str]]) -> Tuple[Optional[Dict[str, Any]], bool]:
+    entry = record_cache.get(key, count=False)
+    hit = _covers(entry, sections)
+    record_cache.count_lookup(hit)
+    return entry, hit
+
+
+async def load_financial_data(user_id: str, sections: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Latest decrypted financial data for a user, or only ``sections`` of it.
+
+    Only the latest record's id is read from Mongo when its sections are
+    already cached; otherwise the missing sections are fetched, decrypted
+    and added to the cache.
+
+    Returns:
+        The requested sections, or None when the user has no record
+    """
+    latest = await financial_collection.find_one(
+        {"user_id": ObjectId(user_id)}, {"_id": 1}, sort=[("created_at", -1)]
+    )
+    if latest is None:
+        return None
+
+    key = (str(user_id), latest["_id"])
+    wanted = list(sections) if sections is not None else None
+    entry, hit = _cached_entry(key, wanted)
+    if not hit:
+        missing = _missing_sections(entry, wanted)
+        record = await financial_collection.find_one({"_id": latest["_id"]}, section_projection(missing))
+        if record is None:
+            return None
+        entry = await asyncio.to_thread(_decrypt_into_entry, record, entry, missing)
+        record_cache.set(key, entry)
+    return _select(entry, wanted)
+
+
+async def iter_financial_data(user_ids: List[str],
+                              sections: Optional[Iterable[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Latest financial data of many users, yielded per user as soon as it is ready.
+
+    Records come from one aggregation; each is decrypted in a worker thread
+    (the ``cryptography`` backend releases the GIL) unless the record cache
+    already covers it. Users without a record get an ``error`` line.
+    """
+    wanted = list(sections) if sections is not None else None
+    user_ids = list(dict.fromkeys(user_ids))
+    records = await fetch_latest_records(user_ids, wanted)
+    for user_id in user_ids:
+        if user_id not in records:
+            yield {"user_id": user_id, "error": "No financial data found for user."}
+
+    async def load(user_id: str) -> Dict[str, Any]:
+        record = records[user_id]
+        key = (user_id, record["_id"])
+        try:
+            entry, hit = _cached_entry(key, wanted)
+            if not hit:
+                entry = await asyncio.to_thread(_decrypt_into_entry, record, entry, _missing_sections(entry, wanted))
+                record_cache.set(key, entry)
+            return {"user_id": user_id, "financial_data": _select(entry, wanted)}
+        except Exception as e:
+            return {"user_id": user_id, "error": f"Error decrypting financial data: {str(e)}"}
+
+    for result in asyncio.as_completed([load(user_id) for user_id in user_ids if user_id in records]):
+        yield await result
@@ -0,0 +1,188 @@
+"""
+Incremental anomaly scoring with running per-user statistics
+"""
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.anomaly_detection import ingest_transactions, ingest_transaction_list, normalize_transactions
+
+ZSCORE_THRESHOLD = 3.0
+# Category statistics are only trusted once they have seen this many debits
+MIN_CATEGORY_COUNT = 5
+
+
+class RunningStats:
+    """
+    Welford running mean/variance over a stream of amounts.
+    """
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def zscore(self, value: float) -> Optional[float]:
+        """Population z-score of ``value``, or None while undefined."""
+        if self.count < 2:
+            return None
+        std = math.sqrt(self.m2 / self.count)
+        if std == 0:
+            return None
+        return (value - self.mean) / std
+
+    def is_finite(self) -> bool:
+        return math.isfinite(self.mean) and math.isfinite(self.m2)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        return cls(int(data["count"]), float(data["mean"]), float(data["m2"]))
+
+
+class UserStats:
+    """
+    Running debit statistics for one user, overall and per category.
+
+    The category of a transaction is its lower-cased description.
+    """
+
+    def __init__(self, overall: Optional[RunningStats] = None,
+                 categories: Optional[Dict[str, RunningStats]] = None):
+        self.overall = overall or RunningStats()
+        self.categories = categories or {}
+
+    @classmethod
+    def from_debits(cls, debits: pd.DataFrame) -> "UserStats":
+        """Bootstrap statistics from a user's full debit history."""
+        stats = cls(_stats_from_amounts(debits['amount']))
+        grouped = debits.groupby(_categories(debits), sort=False)['amount']
+        for category, amounts in grouped:
+            stats.categories[category] = _stats_from_amounts(amounts)
+        return stats
+
+    def score(self, debits: pd.DataFrame, threshold: float = ZSCORE_THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        Score new debits in arrival order, updating the statistics as they go.
+
+        Each transaction is compared with the statistics as they were before
+        it arrived, so cost per transaction is O(1) regardless of history.
+
+        Returns:
+            Anomalies in the same shape as ``detect_anomalies``
+        """
+        anomalies = []
+        debits = debits.sort_values('date', kind='stable')
+        categories = _categories(debits)
+        for date, amount, description, bank, category in zip(
+                debits['date'], debits['amount'], debits['description'], debits['bank'], categories):
+            if not math.isfinite(amount):
+                # One inf would turn every later mean and variance into NaN
+                continue
+            category_stats = self.categories.setdefault(category, RunningStats())
+
+            reasons = []
+            z = self.overall.zscore(amount)
+            if z is not None and abs(z) > threshold:
+                reasons.append("Unusual transaction amount (Z-score)")
+            category_z = category_stats.zscore(amount) if category_stats.count >= MIN_CATEGORY_COUNT else None
+            if category_z is not None and abs(category_z) > threshold:
+                reasons.append("Unusual amount for this category (Z-score)")
+
+            if reasons:
+                anomalies.append({
+                    'date': date.isoformat(),
+                    'amount': amount,
+                    'description': description,
+                    'bank': bank,
+                    'reason': "; ".join(reasons),
+                    'zscore': z
+                })
+
+            self.overall.update(amount)
+            category_stats.update(amount)
+
+        anomalies.sort(key=lambda x: x['amount'], reverse=True)
+        return anomalies
+
+    def is_finite(self) -> bool:
+        return self.overall.is_finite() and all(stats.is_finite() for stats in self.categories.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Categories are stored as a list since descriptions are not safe Mongo keys
+        return {
+            "overall": self.overall.to_dict(),
+            "categories": [
+                {"category": category, **stats.to_dict()}
+                for category, stats in self.categories.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserStats":
+        return cls(
+            RunningStats.from_dict(data["overall"]),
+            {item["category"]: RunningStats.from_dict(item) for item in data.get("categories", [])}
+        )
+
+
+def _categories(debits: pd.DataFrame) -> pd.Series:
+    return debits['description'].fillna("").astype(str).str.strip().str.lower()
+
+
+def _stats_from_amounts(amounts: pd.Series) -> RunningStats:
+    count = int(amounts.size)
+    if count == 0:
+        return RunningStats()
+    mean = float(amounts.mean())
+    return RunningStats(count, mean, float(((amounts - mean) ** 2).sum()))
+
+
+def stats_usable(stats: Optional[Dict[str, Any]]) -> bool:
+    """Whether stored statistics can be scored against, i.e. are well-formed and finite."""
+    if not stats:
+        return False
+    try:
+        return UserStats.from_dict(stats).is_finite()
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def score_new_transactions(transactions: List[Dict[str, Any]],
+                           stats: Optional[Dict[str, Any]] = None,
+                           history: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Score new transactions, bootstrapping statistics from history if needed.
+
+    Args:
+        transactions: New transactions, each carrying a ``bank`` key
+        stats: Stored ``UserStats.to_dict()`` output, if any
+        history: Full financial data used when no usable statistics exist
+
+    Returns:
+        Tuple of (anomalies/count/rejected result, updated statistics dict),
+        the statistics being None if they are not finite and must not be saved
+    """
+    if stats_usable(stats):
+        user_stats = UserStats.from_dict(stats)
+    else:
+        df, _ = normalize_transactions(ingest_transactions(history or {}))
+        user_stats = UserStats.from_debits(df[df['type'] == 'debit'])
+
+    new, rejected = normalize_transactions(ingest_transaction_list(transactions))
+    anomalies = user_stats.score(new[new['type'] == 'debit'])
+    result = {
+        "anomalies": anomalies,
+        "count": len(anomalies),
+        "rejected": rejected
+    }
+    return result, (user_stats.to_dict() if user_stats.is_finite() else None)
@@ -0,0 +1,96 @@
+"""
+Bounded executor for running CPU-bound jobs off the asyncio event loop
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the queue is full."""
+
+
+class JobTimeout(Exception):
+    """Raised when a job does not finish within the pool's timeout."""
+
+
+class JobPool:
+    """
+    Process or thread pool with a bounded backlog and a per-job timeout.
+
+    At most ``max_workers + max_queue`` jobs are admitted at once; further
+    submissions fail fast with ``PoolSaturated``. A job keeps its slot until
+    the worker actually finishes it, even if the caller has timed out.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_queue: int, timeout: float):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def start(self):
+        if self.kind == "process":
+            # forkserver children never inherit locks held by this process's threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("forkserver")
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="anomaly")
+        logger.info(f"Started {self.kind} pool with {self.max_workers} workers, queue {self.max_queue}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` on the pool and await its result.
+
+        Raises:
+            PoolSaturated: If the pool is already at capacity
+            JobTimeout: If the job takes longer than ``timeout`` seconds
+        """
+        if self._executor is None:
+            raise RuntimeError("Job pool is not started")
+        if self._in_flight >= self.capacity:
+            raise PoolSaturated()
+
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        future = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        future.add_done_callback(lambda _: self._release_from(loop))
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            # Frees the slot right away if the job has not started yet
+            future.cancel()
+            raise JobTimeout()
+
+    def _release_from(self, loop: asyncio.AbstractEventLoop):
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass  # Event loop already closed during shutdown
+
+    def _release(self):
+        self._in_flight -= 1
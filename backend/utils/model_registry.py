@@ -0,0 +1,140 @@
+"""
+Registry of fitted anomaly models, cached per user and data version
+"""
+import glob
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from config import ANOMALY_MODEL_DIR, ANOMALY_MODEL_CACHE_SIZE, ANOMALY_REFIT_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+
+def data_version(fingerprints: np.ndarray) -> str:
+    """Stable identifier for a set of transaction fingerprints."""
+    return hashlib.sha256(np.sort(fingerprints).tobytes()).hexdigest()
+
+
+def change_fraction(old: np.ndarray, new: np.ndarray) -> float:
+    """Fraction of transactions added or removed relative to the fitted set."""
+    if old.size == 0:
+        return 1.0
+    return np.setxor1d(old, new, assume_unique=False).size / old.size
+
+
+class ModelRegistry:
+    """
+    Bounded in-memory LRU of fitted models, spilled to disk with joblib.
+
+    Entries are keyed by (user_id, kind), where ``kind`` names the detector and
+    its feature set. A cached model is reused until the user's transaction set
+    changes by more than ``refit_threshold`` of the set it was fitted on.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int, refit_threshold: float):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.refit_threshold = refit_threshold
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_fit(self, user_id: str, kind: str, fingerprints: np.ndarray,
+                   fit: Callable[[], Any]) -> Any:
+        """
+        Return a model for ``user_id`` fitted on data close to ``fingerprints``.
+
+        Args:
+            user_id: Owner of the transactions
+            kind: Detector name and feature set, e.g. ``"iforest-amount"``
+            fingerprints: One uint64 hash per transaction in the current data
+            fit: Callable that fits and returns a fresh model on the current data
+
+        Returns:
+            The cached model, or a newly fitted one
+        """
+        key = (user_id, kind)
+        entry = self._get(key)
+        if entry is not None:
+            if entry["version"] == data_version(fingerprints):
+                return entry["model"]
+            if change_fraction(entry["fingerprints"], fingerprints) <= self.refit_threshold:
+                return entry["model"]
+
+        entry = {
+            "model": fit(),
+            "fingerprints": np.unique(fingerprints),
+            "version": data_version(fingerprints),
+        }
+        self._put(key, entry)
+        return entry["model"]
+
+    def invalidate(self, user_id: str, kind: Optional[str] = None):
+        """Drop cached models for a user, optionally only one kind."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id and kind in (None, k[1])]:
+                del self._entries[key]
+
+        if kind is not None:
+            paths = [self._path((user_id, kind))]
+        else:
+            paths = glob.glob(os.path.join(glob.escape(self.cache_dir), f"{glob.escape(self._stem((user_id, '')))}*.joblib"))
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            entry = joblib.load(path)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable model file {path}: {e}")
+            return None
+
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def _put(self, key: Tuple[str, str], entry: Dict[str, Any]):
+        with self._lock:
+            self._remember(key, entry)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            joblib.dump(entry, tmp_path)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            # The in-memory copy is still usable; only persistence failed
+            logger.warning(f"Could not persist model for {key}: {e}")
+
+    def _remember(self, key: Tuple[str, str], entry: Dict[str, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _stem(self, key: Tuple[str, str]) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", f"{key[0]}__{key[1]}")
+
+    def _path(self, key: Tuple[str, str]) -> str:
+        return os.path.join(self.cache_dir, f"{self._stem(key)}.joblib")
+
+
+model_registry = ModelRegistry(ANOMALY_MODEL_DIR, ANOMALY_MODEL_CACHE_SIZE, ANOMALY_REFIT_THRESHOLD)
@@ -0,0 +1,82 @@
+"""
+Retention job for versioned financial snapshots
+
+Keeps the newest ``keep`` snapshots per user and deletes the rest. Can be run
+as a periodic job from the ``backend`` directory:
+
+    python -m utils.snapshot_retention --keep 5
+    python -m utils.snapshot_retention --keep 3 --dry-run 64f0c0ffee...
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+
+from config import FINANCIAL_SNAPSHOT_RETENTION
+from db.db import financial_collection
+from utils.financial_records import invalidate_cached_records
+
+# Stale snapshot ids removed per delete_many call
+DELETE_BATCH_SIZE = 1000
+
+
+async def compact_snapshots(keep: int = FINANCIAL_SNAPSHOT_RETENTION, user_ids: Optional[List[str]] = None,
+                            dry_run: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Delete all but the newest ``keep`` snapshots of each user.
+
+    One aggregation lists, per user with more than ``keep`` snapshots, the
+    ids past the newest ``keep``; they are then deleted in batches.
+
+    Yields:
+        One dict per compacted user with the number of snapshots removed
+    """
+    if keep < 1:
+        raise ValueError("keep must be at least 1")
+
+    match: Dict[str, Any] = {}
+    if user_ids:
+        match["user_id"] = {"$in": [ObjectId(user_id) for user_id in user_ids]}
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"user_id": 1, "created_at": -1}},
+        {"$group": {"_id": "$user_id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": keep}}},
+        {"$project": {"stale": {"$slice": ["$ids", keep, "$count"]}}},
+    ]
+    async for doc in financial_collection.aggregate(pipeline, allowDiskUse=True):
+        stale = doc["stale"]
+        removed = 0
+        if not dry_run:
+            for start in range(0, len(stale), DELETE_BATCH_SIZE):
+                batch = stale[start:start + DELETE_BATCH_SIZE]
+                result = await financial_collection.delete_many({"_id": {"$in": batch}})
+                removed += result.deleted_count
+            # Only older snapshots go, but drop this worker's copies of them too
+            invalidate_cached_records(str(doc["_id"]))
+        yield {"user_id": str(doc["_id"]), "stale": len(stale), "removed": removed}
+
+
+async def _main(args: argparse.Namespace):
+    async for result in compact_snapshots(args.keep, args.user_ids or None, args.dry_run):
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete all but the newest financial snapshots of each user.")
+    parser.add_argument("user_ids", nargs="*", help="Only compact these users (defaults to everyone)")
+    parser.add_argument("--keep", type=int, default=FINANCIAL_SNAPSHOT_RETENTION,
+                        help="Snapshots to keep per user (defaults to FINANCIAL_SNAPSHOT_RETENTION)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be removed without deleting")
+    args = parser.parse_args()
+    if args.keep < 1:
+        parser.error("--keep must be at least 1")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Bounded-memory anomaly detection for very long transaction histories
+"""
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import ANOMALY_VELOCITY_WINDOW_MINUTES
+from utils.anomaly_detection import (
+    ISOLATION_FOREST_REASONS, PATTERN_REASONS, TIER_STREAMING, _fit_isolation_forest, find_velocity_bursts,
+    format_anomalies, ingest_transaction_list, normalize_transactions
+)
+
+DEFAULT_CHUNK_SIZE = 50_000
+DEFAULT_RESERVOIR_SIZE = 20_000
+# Upper bound on anomalies kept in memory when the caller sets no limit
+DEFAULT_MAX_ANOMALIES = 10_000
+
+STREAMING_REASONS = {
+    **ISOLATION_FOREST_REASONS,
+    'velocity_anomaly': PATTERN_REASONS['velocity_anomaly'],
+}
+
+
+def iter_transactions(data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every transaction in ``banks[].transactions[]`` tagged with its bank.
+    """
+    for bank in data.get('banks') or []:
+        if not isinstance(bank, dict) or 'transactions' not in bank:
+            continue
+        bank_name = bank.get('bankName')
+        for txn in bank['transactions']:
+            yield {**txn, 'bank': bank_name} if isinstance(txn, dict) else {}
+
+
+def iter_transactions_by_date(data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    ``iter_transactions`` in date order, unparseable dates last.
+
+    Velocity windows only carry across chunks for a date-ordered stream; the
+    data is already in memory, so sorting it costs one list of references.
+    """
+    transactions = list(iter_transactions(data))
+    dates = pd.to_datetime(pd.Series([txn.get('date') for txn in transactions], dtype=object),
+                           format='ISO8601', errors='coerce', utc=True)
+    for position in np.argsort(dates.to_numpy(dtype='datetime64[ns]'), kind='stable'):
+        yield transactions[position]
+
+
+def _chunks(transactions: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[Tuple[pd.DataFrame, int]]:
+    """Normalized debit chunks and the number of rows rejected in each."""
+    batch: List[Dict[str, Any]] = []
+    for txn in transactions:
+        batch.append(txn)
+        if len(batch) >= chunk_size:
+            yield _normalize_chunk(batch)
+            batch = []
+    if batch:
+        yield _normalize_chunk(batch)
+
+
+def _normalize_chunk(batch: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, int]:
+    df, rejected = normalize_transactions(ingest_transaction_list(batch))
+    debits = df[df['type'] == 'debit'] if not df.empty else df
+    return debits, rejected
+
+
+class _StreamStats:
+    """Count, mean and M2 of a stream, merged one chunk at a time (Chan et al.)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray):
+        if values.size == 0:
+            return
+        count = values.size
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / self.count)) if self.count else 0.0
+
+
+class _Reservoir:
+    """
+    Uniform sample of at most ``size`` rows from a stream.
+
+    Each row gets a random key and the ``size`` smallest keys are kept, which
+    is equivalent to reservoir sampling but works on whole chunks at once.
+    """
+
+    def __init__(self, size: int, seed: int):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.values = np.empty(0)
+
+    def update(self, values: np.ndarray):
+        keys = np.concatenate([self.keys, self.rng.random(values.size)])
+        values = np.concatenate([self.values, values])
+        if keys.size > self.size:
+            keep = np.argpartition(keys, self.size - 1)[:self.size]
+            keys, values = keys[keep], values[keep]
+        self.keys, self.values = keys, values
+
+
+def _keep_largest(kept: Optional[pd.DataFrame], flagged: pd.DataFrame, max_rows: int) -> pd.DataFrame:
+    combined = flagged if kept is None else pd.concat([kept, flagged], ignore_index=True)
+    if len(combined) > max_rows:
+        positions = np.argpartition(-combined['amount'].to_numpy(), max_rows - 1)[:max_rows]
+        combined = combined.iloc[positions].reset_index(drop=True)
+    return combined
+
+
+def detect_anomalies_streaming(transactions: Callable[[], Iterable[Dict[str, Any]]],
+                               chunk_size: int = DEFAULT_CHUNK_SIZE,
+                               reservoir_size: int = DEFAULT_RESERVOIR_SIZE,
+                               offset: int = 0, limit: Optional[int] = None,
+                               seed: int = 42, since: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Z-score plus Isolation Forest detection in two passes over chunks.
+
+    The first pass accumulates the mean/variance of debit amounts and a
+    reservoir sample that the Isolation Forest is trained on; the second pass
+    scores each chunk and keeps only the largest flagged debits. Velocity
+    bursts are checked per chunk with the debits of the previous chunk's
+    last window carried over, so bursts spanning two chunks are caught when
+    the stream is in date order. Memory is
+    bounded by the chunk, reservoir and result sizes, not the history length,
+    as long as ``transactions`` streams from its source, such as
+    ``transaction_store.iter_stored_transactions``. Fed from a decrypted dict
+    with ``iter_transactions``, only the derived frames are bounded; the
+    dict itself is already in memory.
+
+    Args:
+        transactions: Callable returning a fresh iterable of transactions,
+            each carrying a ``bank`` key, preferably in date order; it is
+            called once per pass
+        chunk_size: Transactions normalized and scored at a time
+        reservoir_size: Debits sampled to train the Isolation Forest
+        offset: Number of anomalies to skip, ordered by amount descending
+        limit: Maximum number of anomalies to return, or None for all
+            (capped at ``DEFAULT_MAX_ANOMALIES`` to keep memory bounded)
+        seed: Seed for the reservoir sample
+        since: Only score debits after this watermark; earlier ones still
+            count towards the statistics and the sample
+
+    Returns:
+        Dict in the same shape as ``run_anomaly_detection``; recurring
+        series and duplicate charges are not tracked across chunks, so
+        ``recurring`` is empty and no debit is flagged as a duplicate
+    """
+    stats = _StreamStats()
+    reservoir = _Reservoir(reservoir_size, seed)
+    rejected = 0
+    latest = pd.Timestamp(since) if since is not None else None
+    for debits, chunk_rejected in _chunks(transactions(), chunk_size):
+        rejected += chunk_rejected
+        if not debits.empty:
+            chunk_latest = debits['date'].max()
+            latest = chunk_latest if latest is None else max(latest, chunk_latest)
+        amounts = debits['amount'].to_numpy(dtype=float)
+        stats.update(amounts)
+        reservoir.update(amounts)
+
+    result = {"anomalies": [], "count": 0, "rejected": rejected, "tier": TIER_STREAMING, "recurring": [],
+              "watermark": latest.isoformat() if latest is not None else None}
+    if stats.count == 0:
+        return result
+
+    iso_forest = _fit_isolation_forest(pd.DataFrame({'amount': reservoir.values}))
+    max_rows = offset + (limit if limit is not None else DEFAULT_MAX_ANOMALIES)
+    kept = None
+    total = 0
+    window = pd.Timedelta(minutes=ANOMALY_VELOCITY_WINDOW_MINUTES)
+    carried = None
+    for debits, _ in _chunks(transactions(), chunk_size):
+        if debits.empty:
+            continue
+        # A burst may have started in the previous chunk; its flag lands on the debit completing it
+        debits = debits.copy()
+        frame = debits if carried is None else pd.concat([carried, debits], ignore_index=True)
+        debits['velocity_anomaly'] = find_velocity_bursts(frame)[len(frame) - len(debits):]
+        carried = frame.loc[frame['date'] >= frame['date'].max() - window, ['date', 'amount', 'bank']]
+
+        if since is not None:
+            debits = debits[debits['date'] > since]
+        if debits.empty:
+            continue
+        # Population z-score against the whole stream, as scipy.stats.zscore
+        debits['zscore'] = (debits['amount'] - stats.mean) / stats.std if stats.std else np.nan
+        debits['zscore_anomaly'] = debits['zscore'].abs() > 1.5
+        debits['iso_anomaly'] = iso_forest.predict(debits[['amount']]) == -1
+        flagged = debits[(debits['zscore_anomaly'] & debits['iso_anomaly']) | debits['velocity_anomaly']]
+        total += len(flagged)
+        if not flagged.empty:
+            kept = _keep_largest(kept, flagged, max_rows)
+
+    if kept is not None:
+        page = format_anomalies(kept, STREAMING_REASONS, offset, limit)
+        result["anomalies"] = page["anomalies"]
+    result["count"] = total
+    return result
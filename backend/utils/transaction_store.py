@@ -0,0 +1,214 @@
+"""
+Optional per-transaction storage alongside the encrypted snapshot
+
+With ``FINANCIAL_TRANSACTION_STORE`` enabled, each transaction of a user's
+latest snapshot is also stored as its own document. Only the fields queries
+filter on are kept in the clear (date and type); the bank is stored as a
+blind index, and the full transaction is sealed per document. Range and
+filter queries then run in Mongo and only the matching rows are decrypted,
+and long histories can be streamed into the anomaly detector one document at
+a time.
+"""
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, MongoClient
+
+from db.db import MONGO_URL, financial_collection, transactions_collection
+from utils.encryptions import blind_index, open_value, seal_value
+from utils.financial_records import record_associated_data
+
+# Transaction documents written per insert_many call
+INSERT_BATCH_SIZE = 1000
+# Transaction documents fetched per round trip when streaming
+STREAM_BATCH_SIZE = 1000
+
+_sync_collection = None
+_sync_lock = threading.Lock()
+
+
+async def ensure_indexes():
+    """Create the transaction collection's indexes if they do not exist yet."""
+    await transactions_collection.create_index(
+        [("user_id", ASCENDING), ("date", DESCENDING)], name="user_date"
+    )
+    # The trailing date keeps per-bank reads in date order without a sort
+    await transactions_collection.create_index(
+        [("user_id", ASCENDING), ("bank_key", ASCENDING), ("date", DESCENDING)], name="user_bank_date"
+    )
+
+
+def _transaction_associated_data(owner: ObjectId) -> bytes:
+    return record_associated_data(owner) + b":transaction"
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Query parameters without an offset are taken as UTC, like the stored dates
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    try:
+        return _as_utc(datetime.fromisoformat(str(value)))
+    except ValueError:
+        return None
+
+
+def _iter_transactions(data: Dict[str, Any]):
+    """Every transaction in the data with its bank name attached."""
+    for bank in data.get("banks") or []:
+        if not isinstance(bank, dict):
+            continue
+        for txn in bank.get("transactions") or []:
+            if isinstance(txn, dict):
+                yield {"bank": bank.get("bankName"), **txn}
+
+
+def _transaction_docs(owner: ObjectId, record_id: ObjectId, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    associated_data = _transaction_associated_data(owner)
+    return [
+        {
+            "user_id": owner,
+            "record_id": record_id,
+            "date": _parse_date(txn.get("date")),
+            "type": str(txn.get("type") or "").lower(),
+            "bank_key": blind_index(str(txn.get("bank") or "")),
+            **seal_value(txn, associated_data)
+        }
+        for txn in _iter_transactions(data)
+    ]
+
+
+async def index_transactions(user_id: str, record_id: ObjectId, data: Dict[str, Any]) -> int:
+    """
+    Store a snapshot's transactions as individual documents.
+
+    The new documents are written before the previous snapshot's are
+    removed, and the snapshot is only marked ``transactions_indexed`` once
+    they are all in place, so readers never see a partial set.
+
+    Returns:
+        Number of transaction documents written
+    """
+    owner = ObjectId(user_id)
+    docs = await asyncio.to_thread(_transaction_docs, owner, record_id, data)
+    for start in range(0, len(docs), INSERT_BATCH_SIZE):
+        await transactions_collection.insert_many(docs[start:start + INSERT_BATCH_SIZE], ordered=False)
+    await financial_collection.update_one({"_id": record_id}, {"$set": {"transactions_indexed": True}})
+    await transactions_collection.delete_many({"user_id": owner, "record_id": {"$ne": record_id}})
+    return len(docs)
+
+
+def _open_transactions(owner: ObjectId, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    associated_data = _transaction_associated_data(owner)
+    return [open_value(doc, associated_data) for doc in docs]
+
+
+def filter_transactions(data: Dict[str, Any], start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        bank: Optional[str] = None, txn_type: Optional[str] = None,
+                        offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """Same filters as ``find_transactions``, applied to decrypted data; for snapshots not yet indexed."""
+    start, end = _as_utc(start), _as_utc(end)
+    bank_name = bank.strip().lower() if bank is not None else None
+    matches = []
+    for txn in _iter_transactions(data):
+        date = _parse_date(txn.get("date"))
+        if (start is not None or end is not None) and date is None:
+            continue
+        if start is not None and date < start:
+            continue
+        if end is not None and date >= end:
+            continue
+        if bank_name is not None and str(txn.get("bank") or "").strip().lower() != bank_name:
+            continue
+        if txn_type is not None and str(txn.get("type") or "").lower() != txn_type.lower():
+            continue
+        matches.append((date or datetime.min.replace(tzinfo=timezone.utc), txn))
+    matches.sort(key=lambda match: match[0], reverse=True)
+    return {"transactions": [txn for _, txn in matches[offset:offset + limit]], "count": len(matches)}
+
+
+async def find_transactions(user_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            bank: Optional[str] = None, txn_type: Optional[str] = None,
+                            offset: int = 0, limit: int = 100) -> Optional[Dict[str, Any]]:
+    """
+    Page through a user's transactions, newest first, filtered in Mongo.
+
+    Args:
+        user_id: Owner of the transactions
+        start: Only transactions on or after this date
+        end: Only transactions before this date
+        bank: Only transactions of this bank (case-insensitive)
+        txn_type: Only "debit" or "credit" transactions
+        offset: Number of transactions to skip
+        limit: Maximum number of transactions to return
+
+    Returns:
+        Dict with the page of decrypted transactions and the total count, or
+        None when the user's latest snapshot has not been indexed
+    """
+    owner = ObjectId(user_id)
+    latest = await financial_collection.find_one(
+        {"user_id": owner}, {"_id": 1, "transactions_indexed": 1}, sort=[("created_at", -1)]
+    )
+    if latest is None or not latest.get("transactions_indexed"):
+        return None
+
+    query: Dict[str, Any] = {"user_id": owner, "record_id": latest["_id"]}
+    if start is not None or end is not None:
+        query["date"] = {}
+        if start is not None:
+            query["date"]["$gte"] = _as_utc(start)
+        if end is not None:
+            query["date"]["$lt"] = _as_utc(end)
+    if bank is not None:
+        query["bank_key"] = blind_index(bank)
+    if txn_type is not None:
+        query["type"] = txn_type.lower()
+
+    cursor = (transactions_collection.find(query, {"nonce": 1, "ciphertext": 1})
+              .sort("date", DESCENDING)
+              .skip(offset)
+              .limit(limit))
+    docs = await cursor.to_list(length=limit)
+    transactions = await asyncio.to_thread(_open_transactions, owner, docs)
+    count = await transactions_collection.count_documents(query)
+    return {"transactions": transactions, "count": count}
+
+
+async def count_stored_transactions(user_id: str, record_id: ObjectId) -> int:
+    """Number of transaction documents stored for a snapshot."""
+    return await transactions_collection.count_documents({"user_id": ObjectId(user_id), "record_id": record_id})
+
+
+def _blocking_transactions():
+    # Pool workers run plain functions, so they read through a blocking client of their own
+    global _sync_collection
+    with _sync_lock:
+        if _sync_collection is None:
+            client = MongoClient(MONGO_URL)
+            _sync_collection = client[transactions_collection.database.name][transactions_collection.name]
+    return _sync_collection
+
+
+def iter_stored_transactions(user_id: str, record_id: ObjectId,
+                             batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yield a snapshot's stored transactions in date order, decrypting one at a time.
+
+    Blocking, for the anomaly pool: only one cursor batch is held in memory,
+    so a history never has to be decrypted whole. Each transaction carries a
+    ``bank`` key, as ``streaming_detection.iter_transactions`` yields them.
+    """
+    owner = ObjectId(user_id)
+    associated_data = _transaction_associated_data(owner)
+    cursor = (_blocking_transactions()
+              .find({"user_id": owner, "record_id": record_id}, {"nonce": 1, "ciphertext": 1}, batch_size=batch_size)
+              .sort("date", ASCENDING))
+    for doc in cursor:
+        yield open_value(doc, associated_data)
@@ -49,6 +49,25 @@ const UtilitiesPage = () => {
     }
   }, [user, financialData, loading, fetchFinancialData]);
 
+  // Subscribe once to anomalies pushed by the backend as they are detected
+  useEffect(() => {
+    if (!user) return;
+
+    const source = new EventSource(
+      `${process.env.NEXT_PUBLIC_BACKEND_URL || 'http://localhost:8000'}/anomalies/${user.id}/events`
+    );
+    source.addEventListener('anomaly', (event) => {
+      const { anomaly } = JSON.parse((event as MessageEvent).data);
+      setAnomalyData((prev: any) => ({
+        ...prev,
+        anomalies: [anomaly, ...(prev?.anomalies || [])],
+        count: (prev?.count || 0) + 1,
+      }));
+    });
+
+    return () => source.close();
+  }, [user]);
+
   // Calculate financial metrics when data is available
   useEffect(() => {
     if (financialData) {